@@ -1,16 +1,24 @@
 """
 Orders Dashboard Source Code
 Organized modules for data pipeline, analytics, and reporting
+
+Submodules are imported lazily (PEP 562) on first attribute access, so
+importing the package does not pull in pandas, Streamlit, MySQL or PDF
+libraries for code paths that never use them.
 """
+import importlib
 
 from .config import FILE_CONFIG, BASE_DIR
-from .data_loader import DataLoader
-from .data_warehouse import DataWarehouse
-from .kpi_analyzer import KPIAnalyzer
-from .report_generator import ReportGenerator
-from .mysql_connector import MySQLConnector
-from .database_schema import DatabaseSchema
-from .mysql_data_loader import MySQLDataLoader
+
+_LAZY = {
+    'DataLoader': ('.data_loader', 'DataLoader'),
+    'DataWarehouse': ('.data_warehouse', 'DataWarehouse'),
+    'KPIAnalyzer': ('.kpi_analyzer', 'KPIAnalyzer'),
+    'ReportGenerator': ('.report_generator', 'ReportGenerator'),
+    'MySQLConnector': ('.mysql_connector', 'MySQLConnector'),
+    'DatabaseSchema': ('.database_schema', 'DatabaseSchema'),
+    'MySQLDataLoader': ('.mysql_data_loader', 'MySQLDataLoader'),
+}
 
 __all__ = [
     'FILE_CONFIG',
@@ -23,3 +31,16 @@ __all__ = [
     'DatabaseSchema',
     'MySQLDataLoader',
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        module_name, attr = _LAZY[name]
+        value = getattr(importlib.import_module(module_name, __name__), attr)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
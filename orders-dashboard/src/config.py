@@ -1,14 +1,17 @@
 """
 Configuration and constants for Orders Dashboard
 """
-import os
+from pathlib import Path
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = Path(__file__).resolve().parent.parent
 
 FILE_CONFIG = {
-    "web": os.path.join(BASE_DIR, "orders_web.csv"),
-    "app": os.path.join(BASE_DIR, "orders_app.csv"),
-    "items": os.path.join(BASE_DIR, "items.csv"),
-    "channels": os.path.join(BASE_DIR, "channels.csv"),
-    "font": os.path.join(BASE_DIR, "Arial.ttf")  
+    key: str(BASE_DIR / file_name)
+    for key, file_name in {
+        "web": "orders_web.csv",
+        "app": "orders_app.csv",
+        "items": "items.csv",
+        "channels": "channels.csv",
+        "font": "Arial.ttf",
+    }.items()
 }
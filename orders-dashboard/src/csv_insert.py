@@ -1,24 +1,40 @@
 """
 CSV Data Insertion Script
 Insert or append CSV data to existing MySQL tables without clearing data
-Usage: python csv_insert.py <csv_file_path> <table_name> [--host] [--user] [--password] [--database]
+Usage: python csv_insert.py <csv_file_path> <table_name> [<csv_file_path> <table_name> ...]
+       [--parallel N] [--host] [--user] [--password] [--database]
 """
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from mysql_connector import MySQLConnector
+from database_schema import DatabaseSchema, CSV_DTYPES
+
+try:
+    import pyarrow  # noqa: F401 - multithreaded CSV parser for read_table_csv
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+
+def read_table_csv(source, table_name: str) -> pd.DataFrame:
+    """Read a whole CSV (path or file-like) for table_name using its known dtypes"""
+    return pd.read_csv(source, engine=CSV_ENGINE, dtype=CSV_DTYPES.get(table_name))
 
 
 class CSVInserter:
     """Insert CSV data into MySQL database tables"""
     
+    CHUNK_SIZE = 50_000
+    
     def __init__(self, host="localhost", user="root", password="root", database="orders_dashboard"):
         self.connector = MySQLConnector(host, user, password, database)
         self.connected = False
     
-    def connect(self):
-        """Connect to MySQL database"""
-        if self.connector.connect():
+    def connect(self, pooled=False):
+        """Connect to MySQL database (pooled: borrow from the shared connection pool)"""
+        if self.connector.connect(pooled):
             self.connected = True
             print("✅ Connected to MySQL database")
             return True
@@ -32,6 +48,11 @@ class CSVInserter:
             self.connector.disconnect()
             print("Disconnected from database")
     
+    def insert_via_load_infile(self, df: pd.DataFrame, table: str, cols: list,
+                               ignore_duplicates: bool = False) -> bool:
+        """Bulk load DataFrame columns through a temp CSV and LOAD DATA LOCAL INFILE"""
+        return self.connector.load_dataframe(df, table, cols, ignore_duplicates)
+    
     def insert_channels(self, df: pd.DataFrame, file_name: str = "channels.csv") -> tuple:
         """Append channels data (INSERT IGNORE to skip duplicates)"""
         try:
@@ -39,26 +60,28 @@ class CSVInserter:
             
             # Validate required columns
             required_cols = ['channel_id', 'channel_name']
-            if not all(col in df.columns for col in required_cols):
-                return False, f"Missing required columns: {required_cols}"
+            missing_cols = set(required_cols).difference(df.columns)
+            if missing_cols:
+                return False, f"Missing required columns: {sorted(missing_cols)}"
             
             # Remove duplicates
-            df = df.drop_duplicates(subset=['channel_id'], keep='last')
+            df = df.drop_duplicates(subset=['channel_id'], keep='last', ignore_index=True)
             
-            # Prepare data
-            data = [(int(row['channel_id']), row['channel_name']) 
-                   for _, row in df.iterrows()]
+            df = df.astype({'channel_id': 'int64'})
             
-            # Insert with ignore duplicates
-            query = """
-            INSERT IGNORE INTO channels (channel_id, channel_name) 
-            VALUES (%s, %s)
-            """
-            success = self.connector.execute_many(query, data)
+            # Bulk load, ignoring duplicates; fall back to multi-row VALUES batches
+            success = self.insert_via_load_infile(
+                df, 'channels', ['channel_id', 'channel_name'], ignore_duplicates=True
+            )
+            if not success:
+                data = list(zip(df['channel_id'].tolist(), df['channel_name'].tolist()))
+                success = self.connector.execute_values_batch(
+                    "INSERT IGNORE INTO channels (channel_id, channel_name)", data
+                )
             
             if success:
-                print(f"✅ Inserted {len(data)} channels")
-                return True, f"Inserted {len(data)} channels"
+                print(f"✅ Inserted {len(df)} channels")
+                return True, f"Inserted {len(df)} channels"
             else:
                 return False, "Failed to insert channels"
         except Exception as e:
@@ -73,34 +96,42 @@ class CSVInserter:
             
             # Validate required columns
             required_cols = ['order_id', 'channel_id', 'order_date', 'status']
-            if not all(col in df.columns for col in required_cols):
-                return False, f"Missing required columns: {required_cols}"
+            missing_cols = set(required_cols).difference(df.columns)
+            if missing_cols:
+                return False, f"Missing required columns: {sorted(missing_cols)}"
             
             # Remove duplicates based on order_id
-            df = df.drop_duplicates(subset=['order_id'], keep='last')
-            
-            # Prepare data
-            data = []
-            for _, row in df.iterrows():
-                data.append((
-                    int(row['order_id']),
-                    int(row['channel_id']),
-                    row['order_date'],
-                    row['status'],
-                    row['updated_at'] if 'updated_at' in row else None
-                ))
-            
-            # Insert or update
-            query = """
-            INSERT INTO orders (order_id, channel_id, order_date, status, updated_at)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                channel_id = VALUES(channel_id),
-                order_date = VALUES(order_date),
-                status = VALUES(status),
-                updated_at = VALUES(updated_at)
-            """
-            success = self.connector.execute_many(query, data)
+            df = df.drop_duplicates(subset=['order_id'], keep='last', ignore_index=True)
+            
+            # Prepare data (cast whole columns once, then zip native values)
+            df = df.astype({'order_id': 'int64', 'channel_id': 'int64'})
+            if 'updated_at' in df.columns:
+                updated_at = df['updated_at'].astype(object).where(df['updated_at'].notna(), None)
+            else:
+                updated_at = pd.Series(None, index=df.index, dtype=object)
+            data = list(zip(
+                df['order_id'].tolist(),
+                df['channel_id'].tolist(),
+                df['order_date'].tolist(),
+                df['status'].tolist(),
+                updated_at.tolist()
+            ))
+            
+            # Insert or update (multi-row VALUES batches)
+            success = self.connector.execute_values_batch(
+                "INSERT INTO orders (order_id, channel_id, order_date, status, updated_at)",
+                data,
+                query_suffix="""
+                ON DUPLICATE KEY UPDATE
+                    channel_id = VALUES(channel_id),
+                    order_date = VALUES(order_date),
+                    status = VALUES(status),
+                    updated_at = VALUES(updated_at)
+                """
+            )
+            # Keep orders.order_total in step for the orders just written
+            if success:
+                success = DatabaseSchema.refresh_order_totals(self.connector, df['order_id'].tolist())
             
             if success:
                 print(f"✅ Inserted/Updated {len(data)} orders")
@@ -119,32 +150,32 @@ class CSVInserter:
             
             # Validate required columns
             required_cols = ['order_id', 'sku', 'quantity', 'unit_price']
-            if not all(col in df.columns for col in required_cols):
-                return False, f"Missing required columns: {required_cols}"
-            
-            # Remove invalid rows
-            df = df.dropna(subset=['order_id', 'quantity', 'unit_price'])
-            
-            # Prepare data
-            data = []
-            for _, row in df.iterrows():
-                data.append((
-                    int(row['order_id']),
-                    row['sku'],
-                    int(row['quantity']),
-                    float(row['unit_price'])
-                ))
-            
-            # Insert
-            query = """
-            INSERT INTO items (order_id, sku, quantity, unit_price)
-            VALUES (%s, %s, %s, %s)
-            """
-            success = self.connector.execute_many(query, data)
+            missing_cols = set(required_cols).difference(df.columns)
+            if missing_cols:
+                return False, f"Missing required columns: {sorted(missing_cols)}"
+            
+            # Coerce numeric columns in one pass each, then drop invalid rows
+            df = df.assign(
+                order_id=pd.to_numeric(df['order_id'], errors='coerce').astype('Int64'),
+                quantity=pd.to_numeric(df['quantity'], errors='coerce').astype('Int64'),
+                unit_price=pd.to_numeric(df['unit_price'], errors='coerce')
+            ).dropna(subset=['order_id', 'quantity', 'unit_price'])
+            df = df.astype({'order_id': 'int64', 'quantity': 'int64'})
+            
+            # Bulk load; fall back to multi-row VALUES batches
+            cols = ['order_id', 'sku', 'quantity', 'unit_price']
+            success = self.insert_via_load_infile(df, 'items', cols)
+            if not success:
+                data = list(zip(*(df[col].tolist() for col in cols)))
+                success = self.connector.execute_values_batch(
+                    "INSERT INTO items (order_id, sku, quantity, unit_price)", data
+                )
+            if success:
+                success = DatabaseSchema.refresh_order_totals(self.connector, df['order_id'].tolist())
             
             if success:
-                print(f"✅ Inserted {len(data)} items")
-                return True, f"Inserted {len(data)} items"
+                print(f"✅ Inserted {len(df)} items")
+                return True, f"Inserted {len(df)} items"
             else:
                 return False, "Failed to insert items"
         except Exception as e:
@@ -153,25 +184,45 @@ class CSVInserter:
             return False, error_msg
     
     def insert_data(self, csv_file: str, table_name: str) -> tuple:
-        """Generic insert function - accepts any table name"""
+        """Generic insert function - accepts any table name, streams the CSV in chunks"""
         try:
-            # Load CSV
-            print(f"\n📂 Loading {csv_file}...")
-            df = pd.read_csv(csv_file)
-            print(f"✅ Loaded {len(df)} rows")
-            
             # Normalize table name
             table_name = table_name.lower().strip()
             
             # Route to appropriate function
-            if table_name == "channels":
-                return self.insert_channels(df, csv_file)
-            elif table_name == "orders":
-                return self.insert_orders(df, csv_file)
-            elif table_name == "items":
-                return self.insert_items(df, csv_file)
-            else:
+            insert_funcs = {
+                "channels": self.insert_channels,
+                "orders": self.insert_orders,
+                "items": self.insert_items,
+            }
+            if table_name not in insert_funcs:
                 return False, f"Unsupported table: {table_name}. Supported: channels, orders, items"
+            insert_func = insert_funcs[table_name]
+            
+            # Load CSV chunk by chunk and insert each chunk as it is read,
+            # all inside one transaction (single commit for the whole file)
+            print(f"\n📂 Loading {csv_file}...")
+            reader = pd.read_csv(csv_file, chunksize=self.CHUNK_SIZE, dtype=CSV_DTYPES[table_name])
+            total_rows = 0
+            messages = []
+            self.connector.begin()
+            try:
+                for chunk in reader:
+                    print(f"✅ Loaded {len(chunk)} rows")
+                    total_rows += len(chunk)
+                    success, message = insert_func(chunk, csv_file)
+                    if not success:
+                        self.connector.rollback()
+                        return False, message
+                    messages.append(message)
+                self.connector.commit()
+            except Exception:
+                self.connector.rollback()
+                raise
+            
+            if len(messages) == 1:
+                return True, messages[0]
+            return True, f"Processed {total_rows} rows from {csv_file} in {len(messages)} chunks"
         
         except FileNotFoundError:
             error_msg = f"File not found: {csv_file}"
@@ -183,6 +234,28 @@ class CSVInserter:
             return False, error_msg
 
 
+def bulk_insert_many(files: list, workers: int = 1, **conn_kwargs) -> list:
+    """
+    Insert several (csv_file, table) pairs, up to `workers` files at a time.
+    
+    Each file is handled by its own CSVInserter (and so its own connection and
+    transaction), letting CSV parsing of one file overlap with INSERT round
+    trips of another. Returns a list of (csv_file, success, message) in input order.
+    """
+    def _insert_one(csv_file, table):
+        inserter = CSVInserter(**conn_kwargs)
+        if not inserter.connect():
+            return csv_file, False, "Failed to connect to MySQL database"
+        try:
+            return (csv_file, *inserter.insert_data(csv_file, table))
+        finally:
+            inserter.disconnect()
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_insert_one, csv_file, table) for csv_file, table in files]
+        return [future.result() for future in futures]
+
+
 def main():
     """Command-line interface"""
     parser = argparse.ArgumentParser(
@@ -193,11 +266,14 @@ Examples:
   python csv_insert.py data/orders.csv orders
   python csv_insert.py data/channels.csv channels --host localhost --user root
   python csv_insert.py data/items.csv items --database orders_dashboard
+  python csv_insert.py data/orders_web.csv orders data/items.csv items --parallel 2
         """
     )
     
-    parser.add_argument("csv_file", help="Path to CSV file")
-    parser.add_argument("table", help="Table name (channels, orders, items)")
+    parser.add_argument("inputs", nargs="+", metavar="CSV_FILE TABLE",
+                        help="One or more pairs of CSV file path and table name (channels, orders, items)")
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="Number of files to insert concurrently (default: 1)")
     parser.add_argument("--host", default="localhost", help="MySQL host (default: localhost)")
     parser.add_argument("--user", default="root", help="MySQL user (default: root)")
     parser.add_argument("--password", default="root", help="MySQL password (default: root)")
@@ -205,21 +281,37 @@ Examples:
     
     args = parser.parse_args()
     
-    # Create inserter
-    inserter = CSVInserter(
+    if len(args.inputs) % 2:
+        parser.error("inputs must be given as CSV_FILE TABLE pairs")
+    files = list(zip(args.inputs[0::2], args.inputs[1::2]))
+    
+    conn_kwargs = dict(
         host=args.host,
         user=args.user,
         password=args.password,
         database=args.database
     )
     
+    if len(files) > 1:
+        results = bulk_insert_many(files, args.parallel, **conn_kwargs)
+        failed = [r for r in results if not r[1]]
+        for csv_file, success, message in results:
+            status = "✅ SUCCESS" if success else "❌ FAILED"
+            print(f"{status}: {csv_file}: {message}")
+        sys.exit(1 if failed else 0)
+    
+    csv_file, table = files[0]
+    
+    # Create inserter
+    inserter = CSVInserter(**conn_kwargs)
+    
     # Connect
     if not inserter.connect():
         sys.exit(1)
     
     try:
         # Insert data
-        success, message = inserter.insert_data(args.csv_file, args.table)
+        success, message = inserter.insert_data(csv_file, table)
         
         if success:
             print(f"\n✅ SUCCESS: {message}")
@@ -5,8 +5,10 @@ Uses html2image to capture dashboard, then embeds in PDF with all filtered data
 import io
 import os
 import tempfile
+from concurrent.futures import Future
 from datetime import datetime
 import pandas as pd
+import numpy as np
 
 try:
     from reportlab.lib.pagesizes import letter
@@ -14,11 +16,167 @@ try:
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import inch
     from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image as RLImage
+    from reportlab.platypus import Flowable
     from reportlab.lib.enums import TA_CENTER, TA_RIGHT
     REPORTLAB_AVAILABLE = True
 except ImportError:
     REPORTLAB_AVAILABLE = False
 
+
+def _minimal_pdf(text: str) -> bytes:
+    """Hand-written one-page PDF showing a single line of Helvetica text"""
+    content = f"BT /F1 14 Tf 40 740 Td ({text}) Tj ET".encode('latin-1')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (num, obj)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# Returned for exports with nothing to render (no rows, charts or screenshot)
+_EMPTY_PDF = _minimal_pdf("Orders Analytics Dashboard - no data for the selected filters")
+
+if REPORTLAB_AVAILABLE:
+    # Styles are immutable once built, so create them once at import
+    _STYLES = getSampleStyleSheet()
+    
+    _TITLE_STYLE = ParagraphStyle(
+        'CustomTitle',
+        parent=_STYLES['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#0066cc'),
+        spaceAfter=4,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+    
+    _HEADING_STYLE = ParagraphStyle(
+        'CustomHeading',
+        parent=_STYLES['Heading2'],
+        fontSize=11,
+        textColor=colors.HexColor('#0066cc'),
+        spaceAfter=6,
+        spaceBefore=8,
+        fontName='Helvetica-Bold'
+    )
+    
+    _METRICS_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066cc')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('TOPPADDING', (0, 1), (-1, -1), 5),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
+    ])
+    
+    _DATA_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066cc')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 7.5),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
+        ('FONTSIZE', (0, 1), (-1, -1), 6.5),
+        ('TOPPADDING', (0, 1), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
+    ])
+    
+    class FastRowBlock(Flowable):
+        """
+        Long order listing drawn straight onto the canvas
+        
+        Looks like the data Table (blue header, zebra rows, grid, last column
+        right-aligned) but skips Table's per-cell measuring: column widths are
+        fixed and every row has the same height, so splitting at a page break
+        is just slicing the row list.
+        """
+        
+        ROW_HEIGHT = 11
+        PADDING = 3
+        
+        def __init__(self, header: list, rows: list, col_widths: list):
+            super().__init__()
+            self.header = header
+            self.rows = rows
+            self.col_widths = col_widths
+            self.width = sum(col_widths)
+            self.height = (len(rows) + 1) * self.ROW_HEIGHT
+        
+        def wrap(self, availWidth, availHeight):
+            return self.width, self.height
+        
+        def split(self, availWidth, availHeight):
+            fit = int(availHeight // self.ROW_HEIGHT) - 1  # header repeats on each part
+            if fit < 1:
+                return []
+            return [FastRowBlock(self.header, self.rows[:fit], self.col_widths),
+                    FastRowBlock(self.header, self.rows[fit:], self.col_widths)]
+        
+        def draw(self):
+            canv = self.canv
+            row_h = self.ROW_HEIGHT
+            xs = [0]
+            for w in self.col_widths:
+                xs.append(xs[-1] + w)
+            
+            # Header row
+            y = self.height - row_h
+            canv.setFillColor(colors.HexColor('#0066cc'))
+            canv.rect(0, y, self.width, row_h, stroke=0, fill=1)
+            canv.setFillColor(colors.whitesmoke)
+            canv.setFont('Helvetica-Bold', 7.5)
+            self._draw_cells(self.header, xs, y)
+            
+            # Body rows with alternating background
+            canv.setFont('Helvetica', 6.5)
+            for i, row in enumerate(self.rows):
+                y -= row_h
+                if i % 2:
+                    canv.setFillColor(colors.HexColor('#f8f9fa'))
+                    canv.rect(0, y, self.width, row_h, stroke=0, fill=1)
+                canv.setFillColor(colors.black)
+                self._draw_cells(row, xs, y)
+            
+            # Grid
+            canv.setStrokeColor(colors.grey)
+            canv.setLineWidth(0.5)
+            for x in xs:
+                canv.line(x, 0, x, self.height)
+            for k in range(len(self.rows) + 2):
+                canv.line(0, k * row_h, self.width, k * row_h)
+        
+        def _draw_cells(self, row, xs, y):
+            baseline = y + self.PADDING + 1
+            last = len(row) - 1
+            for j, text in enumerate(row):
+                if j == last:
+                    self.canv.drawRightString(xs[j + 1] - self.PADDING, baseline, text)
+                else:
+                    self.canv.drawString(xs[j] + self.PADDING, baseline, text)
+
 try:
     from PIL import Image
     PIL_AVAILABLE = True
@@ -31,12 +189,78 @@ class DashboardExporter:
     Export dashboard to PDF with screenshot and complete data table
     """
     
+    TABLE_CHUNK_ROWS = 500
+    SCREENSHOT_WIDTH_PX = 900
+    
     def __init__(self):
         if not REPORTLAB_AVAILABLE:
             raise ImportError("reportlab is required. Install with: pip install reportlab")
     
+    def _downscale_screenshot(self, screenshot_path: str):
+        """
+        Shrink the screenshot to SCREENSHOT_WIDTH_PX wide and re-encode as JPEG
+        
+        The PDF shows it at a fixed 7 inches, so the full-resolution PNG only
+        costs ReportLab encode time and file size. Returns the temp JPEG path,
+        or None if PIL is unavailable or the conversion fails.
+        """
+        if not PIL_AVAILABLE:
+            return None
+        try:
+            with Image.open(screenshot_path) as img:
+                img.thumbnail((self.SCREENSHOT_WIDTH_PX, img.height), Image.LANCZOS)
+                with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
+                    img.convert('RGB').save(tmp, 'JPEG', quality=85, optimize=True)
+            return tmp.name
+        except Exception as e:
+            print(f"Screenshot downscale failed: {e}")
+            return None
+    
+    def _build_data_table(self, table_data: pd.DataFrame) -> list:
+        """Flowables for the complete order data section (empty list if no rows)"""
+        if table_data.empty:
+            return []
+        
+        elements = [PageBreak()]
+        elements.append(Paragraph(f"Complete Order Data - {len(table_data)} Records", _HEADING_STYLE))
+        
+        display_cols = ['order_id', 'channel_name', 'status', 'order_total']
+        available_cols = [col for col in display_cols if col in table_data.columns]
+        
+        if available_cols:
+            # Format column by column from the raw arrays (no copy, no per-row Series);
+            # categoricals are truncated once per category and expanded via codes
+            formatted_cols = []
+            for col in available_cols:
+                values = table_data[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    labels = [str(val)[:18] for val in values.cat.categories.tolist()]
+                    labels.append('nan')  # code -1 marks a missing value
+                    formatted_cols.append(np.asarray(labels, dtype=object)[values.cat.codes.to_numpy()].tolist())
+                elif values.dtype.kind == 'f':
+                    formatted_cols.append([f"${val:,.2f}" for val in values.to_numpy().tolist()])
+                else:
+                    formatted_cols.append([str(val)[:18] for val in values.to_numpy().tolist()])
+            
+            # Convert to list for PDF table
+            table_list = [list(available_cols)]
+            table_list.extend(map(list, zip(*formatted_cols)))
+            
+            col_widths = [1*inch if col == 'order_total' else 1.05*inch for col in available_cols]
+            
+            # Styled Table for short listings; past TABLE_CHUNK_ROWS rows Table's
+            # measuring and superlinear split cost dominate, so draw rows directly
+            if len(table_list) - 1 > self.TABLE_CHUNK_ROWS:
+                elements.append(FastRowBlock(table_list[0], table_list[1:], col_widths))
+            else:
+                data_table = Table(table_list, colWidths=col_widths, repeatRows=1)
+                data_table.setStyle(_DATA_TABLE_STYLE)
+                elements.append(data_table)
+        
+        return elements
+    
     def export_dashboard_pdf(self, metrics: dict, chart_data: dict, 
-                            table_data: pd.DataFrame, screenshot_path: str = None) -> bytes:
+                            table_data: pd.DataFrame, screenshot_path=None) -> bytes:
         """
         Create PDF with dashboard screenshot and complete filtered data table
         
@@ -44,11 +268,31 @@ class DashboardExporter:
             metrics: Dictionary with: total_orders, completed_pct, total_revenue, avg_order_value
             chart_data: Dictionary with channel_dist and status_dist
             table_data: DataFrame with ALL filtered order data (will show all rows)
-            screenshot_path: Path to dashboard screenshot image (optional)
+            screenshot_path: Path to dashboard screenshot image, or a Future that
+                resolves to one (optional)
             
         Returns:
             bytes: PDF file content
         """
+        pdf_buffer = self._render_pdf(metrics, chart_data, table_data, screenshot_path)
+        # getvalue() hands over BytesIO's internal bytes object without copying
+        # (CPython shares it while no memoryview is exported); getbuffer() would
+        # pin the buffer and return a memoryview, which callers expect as bytes
+        return pdf_buffer.getvalue()
+    
+    def _render_pdf(self, metrics: dict, chart_data: dict,
+                    table_data: pd.DataFrame, screenshot_path=None) -> io.BytesIO:
+        """Lay out the export and return the buffer holding the PDF"""
+        # Nothing to render: skip the layout engine entirely
+        if (table_data.empty and screenshot_path is None
+                and not any(len(values) for values in chart_data.values())):
+            return io.BytesIO(_EMPTY_PDF)
+
+        # Format the data table first so a pending screenshot can finish meanwhile
+        table_elements = self._build_data_table(table_data)
+        if isinstance(screenshot_path, Future):
+            screenshot_path = screenshot_path.result()
+        
         pdf_buffer = io.BytesIO()
         doc = SimpleDocTemplate(
             pdf_buffer,
@@ -60,47 +304,27 @@ class DashboardExporter:
         )
         
         elements = []
-        styles = getSampleStyleSheet()
-        
-        # Title style
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#0066cc'),
-            spaceAfter=4,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=11,
-            textColor=colors.HexColor('#0066cc'),
-            spaceAfter=6,
-            spaceBefore=8,
-            fontName='Helvetica-Bold'
-        )
+        small_screenshot = None
         
         # Title and timestamp
-        elements.append(Paragraph("Orders Analytics Dashboard", title_style))
+        elements.append(Paragraph("Orders Analytics Dashboard", _TITLE_STYLE))
         elements.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", 
-                                 styles['Normal']))
+                                 _STYLES['Normal']))
         elements.append(Spacer(1, 0.15*inch))        
         # Add dashboard screenshot if available
         if screenshot_path and os.path.exists(screenshot_path):
             try:
-                elements.append(Paragraph("Dashboard Screenshot", heading_style))
+                elements.append(Paragraph("Dashboard Screenshot", _HEADING_STYLE))
                 # Scale screenshot to fit page width with proper aspect ratio
-                img = RLImage(screenshot_path, width=7*inch, height=5*inch)
+                small_screenshot = self._downscale_screenshot(screenshot_path)
+                img = RLImage(small_screenshot or screenshot_path, width=7*inch, height=5*inch)
                 elements.append(img)
                 elements.append(Spacer(1, 0.15*inch))
             except Exception as e:
                 pass  # Skip if screenshot fails
         
         # Add metrics summary
-        elements.append(Paragraph("Key Metrics", heading_style))
+        elements.append(Paragraph("Key Metrics", _HEADING_STYLE))
         
         metrics_data = [
             ['Metric', 'Value'],
@@ -111,71 +335,21 @@ class DashboardExporter:
         ]
         
         metrics_table = Table(metrics_data, colWidths=[2.3*inch, 1.8*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066cc')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 5),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 5),
-        ]))
+        metrics_table.setStyle(_METRICS_TABLE_STYLE)
         
         elements.append(metrics_table)
         elements.append(Spacer(1, 0.15*inch))
         
         # Complete Data Table - ALL filtered records on new pages
-        if not table_data.empty:
-            elements.append(PageBreak())
-            elements.append(Paragraph(f"Complete Order Data - {len(table_data)} Records", heading_style))
-            
-            display_cols = ['order_id', 'channel_name', 'status', 'order_total']
-            available_cols = [col for col in display_cols if col in table_data.columns]
-            
-            if available_cols:
-                df_display = table_data[available_cols].copy()
-                
-                # Convert to list for PDF table
-                table_list = [list(df_display.columns)]
-                for _, row in df_display.iterrows():
-                    row_data = []
-                    for col in available_cols:
-                        val = row[col]
-                        if isinstance(val, float):
-                            row_data.append(f"${val:,.2f}")
-                        else:
-                            row_data.append(str(val)[:18])
-                    table_list.append(row_data)
-                
-                col_widths = [1*inch if col == 'order_total' else 1.05*inch for col in available_cols]
-                data_table = Table(table_list, colWidths=col_widths, repeatRows=1)
-                
-                data_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0066cc')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, 0), 7.5),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')]),
-                    ('FONTSIZE', (0, 1), (-1, -1), 6.5),
-                    ('TOPPADDING', (0, 1), (-1, -1), 3),
-                    ('BOTTOMPADDING', (0, 1), (-1, -1), 3),
-                ]))
-                elements.append(data_table)
+        elements.extend(table_elements)
         
-        # Build PDF
-        doc.build(elements)
-        pdf_buffer.seek(0)
-        return pdf_buffer.getvalue()
+        # Build PDF (RLImage reads the screenshot file during build)
+        try:
+            doc.build(elements)
+        finally:
+            if small_screenshot:
+                os.remove(small_screenshot)
+        return pdf_buffer
 
 
 def take_dashboard_screenshot(url: str, output_path: str) -> bool:
@@ -5,13 +5,18 @@ Clean UI with charts and data visualization
 import streamlit as st
 import pandas as pd
 import altair as alt
+import numpy as np
 from datetime import datetime
 import os
+import math
 import tempfile
-import base64
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from mysql.connector import Error
 from mysql_connector import MySQLConnector
 from dashboard_exporter import DashboardExporter, take_dashboard_screenshot
-from csv_insert import CSVInserter
+from csv_insert import CSVInserter, read_table_csv
 
 # ============================================================================
 # PAGE CONFIGURATION
@@ -23,6 +28,15 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Rows per page of the orders table widget
+TABLE_PAGE_SIZE = 50
+
+try:
+    import pyarrow  # noqa: F401 - Arrow-backed columns for large query results
+    QUERY_DTYPE_BACKEND = "pyarrow"
+except ImportError:
+    QUERY_DTYPE_BACKEND = None
+
 # Initialize session state
 if 'theme' not in st.session_state:
     st.session_state.theme = 'dark'
@@ -37,85 +51,109 @@ st.sidebar.markdown("""
 <h3 style='color: #f8fafc; margin-top: 1rem; margin-bottom: 1.5rem;'>Data Input</h3>
 """, unsafe_allow_html=True)
 
-with st.sidebar.expander("Upload & Update", expanded=False):
-    st.markdown("Upload your CSV files to update the database:")
-    
-    up_channels = st.file_uploader("Channels (.csv)", type='csv', key='channels_upload')
-    up_orders = st.file_uploader("Orders (.csv)", type='csv', key='orders_upload')
-    up_items = st.file_uploader("Items (.csv)", type='csv', key='items_upload')
-    
-    # Process uploaded files
-    if up_channels or up_orders or up_items:
-        if st.button("Upload to Database", use_container_width=True):
-            with st.spinner("Processing files..."):
-                try:
-                    inserter = CSVInserter(
-                        host="localhost",
-                        user="root",
-                        password="",  # Empty password
-                        database="orders_dashboard"
-                    )
-                    
-                    if not inserter.connect():
-                        st.error("Failed to connect to database")
-                        st.stop()
-                    
-                    results = []
-                    
-                    # Process channels
-                    if up_channels:
-                        try:
-                            df_channels = pd.read_csv(up_channels)
-                            success, msg = inserter.insert_channels(df_channels, up_channels.name)
-                            results.append(("Channels", success, msg))
-                            st.sidebar.info(f"Channels: {msg}" if success else f"Channels: {msg}")
-                        except Exception as e:
-                            results.append(("Channels", False, str(e)))
-                            st.sidebar.error(f"Channels Error: {e}")
-                    
-                    # Process orders
-                    if up_orders:
-                        try:
-                            df_orders = pd.read_csv(up_orders)
-                            success, msg = inserter.insert_orders(df_orders, up_orders.name)
-                            results.append(("Orders", success, msg))
-                            st.sidebar.info(f"Orders: {msg}" if success else f"Orders: {msg}")
-                        except Exception as e:
-                            results.append(("Orders", False, str(e)))
-                            st.sidebar.error(f"Orders Error: {e}")
-                    
-                    # Process items
-                    if up_items:
-                        try:
-                            df_items = pd.read_csv(up_items)
-                            success, msg = inserter.insert_items(df_items, up_items.name)
-                            results.append(("Items", success, msg))
-                            st.sidebar.info(f"Items: {msg}" if success else f"Items: {msg}")
-                        except Exception as e:
-                            results.append(("Items", False, str(e)))
-                            st.sidebar.error(f"Items Error: {e}")
-                    
-                    inserter.disconnect()
-                    
-                    # Summary
-                    all_success = all(r[1] for r in results)
-                    if all_success:
-                        st.sidebar.success(f"All files processed successfully!")
-                        st.success("Upload complete! Please press F5 to refresh and see the new data.")
-                    else:
-                        st.sidebar.warning("Some files had issues. Check messages above.")
+
+@st.fragment
+def upload_panel():
+    """Upload form; runs as a fragment so picking files does not rerun the whole dashboard"""
+    with st.expander("Upload & Update", expanded=False):
+        st.markdown("Upload your CSV files to update the database:")
+        
+        # Messages from the upload that triggered the last full rerun
+        notice = st.session_state.pop('upload_notice', None)
+        if notice:
+            st.success(notice)
+        for error in st.session_state.pop('upload_errors', []):
+            st.error(error)
+        
+        up_channels = st.file_uploader("Channels (.csv)", type='csv', key='channels_upload')
+        up_orders = st.file_uploader("Orders (.csv)", type='csv', key='orders_upload')
+        up_items = st.file_uploader("Items (.csv)", type='csv', key='items_upload')
+        
+        # Process uploaded files
+        if up_channels or up_orders or up_items:
+            if st.button("Upload to Database", use_container_width=True):
+                with st.spinner("Processing files..."):
+                    try:
+                        inserter = CSVInserter(
+                            host="localhost",
+                            user="root",
+                            password="",  # Empty password
+                            database="orders_dashboard"
+                        )
+                        
+                        # Pooled: repeat uploads skip the connect/auth handshake
+                        if not inserter.connect(pooled=True):
+                            st.error("Failed to connect to database")
+                            st.stop()
+                        
+                        results = []
+                        
+                        # Process channels
+                        if up_channels:
+                            try:
+                                df_channels = read_table_csv(up_channels, "channels")
+                                success, msg = inserter.insert_channels(df_channels, up_channels.name)
+                                results.append(("Channels", success, msg))
+                                st.info(f"Channels: {msg}" if success else f"Channels: {msg}")
+                            except Exception as e:
+                                results.append(("Channels", False, str(e)))
+                                st.error(f"Channels Error: {e}")
+                        
+                        # Process orders
+                        if up_orders:
+                            try:
+                                df_orders = read_table_csv(up_orders, "orders")
+                                success, msg = inserter.insert_orders(df_orders, up_orders.name)
+                                results.append(("Orders", success, msg))
+                                st.info(f"Orders: {msg}" if success else f"Orders: {msg}")
+                            except Exception as e:
+                                results.append(("Orders", False, str(e)))
+                                st.error(f"Orders Error: {e}")
+                        
+                        # Process items
+                        if up_items:
+                            try:
+                                df_items = read_table_csv(up_items, "items")
+                                success, msg = inserter.insert_items(df_items, up_items.name)
+                                results.append(("Items", success, msg))
+                                st.info(f"Items: {msg}" if success else f"Items: {msg}")
+                            except Exception as e:
+                                results.append(("Items", False, str(e)))
+                                st.error(f"Items Error: {e}")
                         
-                except Exception as e:
-                    st.sidebar.error(f"Error: {e}")
+                        inserter.disconnect()
+                        
+                        # Summary
+                        if any(r[1] for r in results):
+                            # New refresh_counter value re-probes the data version
+                            st.session_state.refresh_counter += 1
+                            if all(r[1] for r in results):
+                                st.session_state.upload_notice = "All files processed successfully!"
+                            else:
+                                # Shown again after the rerun below, which clears this run's messages
+                                st.session_state.upload_notice = "Some files were uploaded; the others had issues:"
+                                st.session_state.upload_errors = [
+                                    f"{name}: {msg}" for name, success, msg in results if not success
+                                ]
+                        else:
+                            st.warning("Some files had issues. Check messages above.")
+                            
+                    except Exception as e:
+                        st.error(f"Error: {e}")
+                
+                # Redraw the whole dashboard once anything was committed
+                if st.session_state.get('upload_notice'):
+                    st.rerun()
+
+
+with st.sidebar:
+    upload_panel()
 
 # ============================================================================
 # CUSTOM STYLING
 # ============================================================================
 
-def apply_custom_styling():
-    """Apply custom CSS styling"""
-    if st.session_state.theme == 'dark':
-        theme_css = """
+_DARK_CSS = """
         <style>
         :root {
             --primary-color: #0066cc;
@@ -207,8 +245,8 @@ def apply_custom_styling():
         }
         </style>
         """
-    else:
-        theme_css = """
+
+_LIGHT_CSS = """
         <style>
         :root {
             --primary-color: #0066cc;
@@ -270,11 +308,18 @@ def apply_custom_styling():
         }
         </style>
         """
-    st.markdown(f"""
-    <style>
-    {theme_css}
-    </style>
-    """, unsafe_allow_html=True)
+
+# Each CSS constant is already a complete <style> block
+_THEME_CSS = {'dark': _DARK_CSS, 'light': _LIGHT_CSS}
+
+def apply_custom_styling():
+    """
+    Apply custom CSS styling
+    
+    Called on every rerun: Streamlit drops elements a rerun doesn't emit, so
+    injecting the CSS only once per session would unstyle the page afterwards.
+    """
+    st.markdown(_THEME_CSS.get(st.session_state.theme, _LIGHT_CSS), unsafe_allow_html=True)
 
 apply_custom_styling()
 
@@ -288,44 +333,248 @@ if 'pdf_filename' not in st.session_state:
     st.session_state.pdf_filename = None
 if 'export_triggered' not in st.session_state:
     st.session_state.export_triggered = False
+if 'export_job' not in st.session_state:
+    st.session_state.export_job = None  # (filter_key, Future) while a PDF is being built
+
+@st.cache_resource
+def get_exporter():
+    """Shared DashboardExporter (stateless, so one instance serves every session)"""
+    return DashboardExporter()
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_database_data(refresh_trigger=0):
-    """Load all orders data from database"""
-    # refresh_trigger parameter is used to invalidate cache on demand
+def capture_screenshot(url, output_path):
+    """Screenshot the dashboard; returns output_path, or None if it failed"""
     try:
-        db = MySQLConnector(
-            host="localhost",
-            user="root",
-            password="",  # Empty password
-            database="orders_dashboard"
-        )
+        if take_dashboard_screenshot(url, output_path) and os.path.exists(output_path):
+            return output_path
+    except Exception:
+        pass
+    return None
+
+@st.cache_resource
+def get_export_pool():
+    """Background workers for PDF exports, shared by all sessions"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-export")
+
+def build_dashboard_pdf(metrics, chart_data, export_df):
+    """
+    Screenshot the dashboard and render the PDF; runs on the export pool
+    
+    No st.* calls here (worker threads have no script context). Returns the
+    PDF bytes, or None if generation failed.
+    """
+    # Take screenshot in the background while the PDF table is built
+    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+        tmp_screenshot = tmp.name
+    screenshot_pool = ThreadPoolExecutor(max_workers=1)
+    screenshot_future = screenshot_pool.submit(
+        capture_screenshot, "http://localhost:8501", tmp_screenshot
+    )
+    screenshot_pool.shutdown(wait=False)
+    try:
+        return get_exporter().export_dashboard_pdf(metrics, chart_data, export_df, screenshot_future)
+    finally:
+        screenshot_future.result()  # the screenshot must be done before its file is removed
+        if os.path.exists(tmp_screenshot):
+            try:
+                os.remove(tmp_screenshot)
+            except OSError:
+                pass
+
+# Exports (running or finished) kept per view for reuse across sessions
+EXPORT_CACHE_ENTRIES = 8
+
+@st.cache_resource
+def get_export_jobs():
+    """Export Futures keyed on filter_key (data version + filters), with their lock"""
+    return OrderedDict(), threading.Lock()
+
+def submit_export(filter_key, metrics, chart_data, export_df):
+    """
+    Future for the PDF of filter_key's view
+    
+    Reuses a running or successful export of the same view (from any
+    session); a failed one is retried.
+    """
+    jobs, lock = get_export_jobs()
+    with lock:
+        future = jobs.get(filter_key)
+        if future is None or (future.done() and (future.exception() or not future.result())):
+            future = get_export_pool().submit(build_dashboard_pdf, metrics, chart_data, export_df)
+            jobs[filter_key] = future
+        jobs.move_to_end(filter_key)
+        while len(jobs) > EXPORT_CACHE_ENTRIES:
+            jobs.popitem(last=False)
+    return future
+
+@st.fragment(run_every=1)
+def export_progress():
+    """Shown while an export runs; reruns the app once the PDF is ready"""
+    job = st.session_state.export_job
+    if job is not None and job[1].done():
+        st.rerun()
+    st.info("Generating PDF...")
+
+# Connections kept open for the dashboard queries
+DB_POOL_SIZE = 5
+
+@st.cache_resource
+def get_db_pool():
+    """
+    Connection pool shared by the dashboard queries (connect/auth paid once per connection)
+    
+    Returned with the semaphore that bounds its borrowers: the pool raises
+    instead of blocking when empty, and a semaphore created in the script body
+    would be rebuilt on every rerun. The pool is None if MySQL is unreachable.
+    """
+    pool = MySQLConnector(
+        host="localhost",
+        user="root",
+        password="",  # Empty password
+        database="orders_dashboard"
+    ).create_pool(pool_name="dashboard", pool_size=DB_POOL_SIZE)
+    return pool, threading.BoundedSemaphore(DB_POOL_SIZE)
+
+def query_df(query, params=None, dtype_backend=None):
+    """
+    Run a read query on a pooled connection; None if MySQL is unreachable
+    
+    Each query borrows its own connection, so sessions only wait on each
+    other once all DB_POOL_SIZE connections are busy. dtype_backend is passed
+    to read_sql when set ("pyarrow" builds Arrow columns, no object columns).
+    """
+    pool, slots = get_db_pool()
+    if pool is None:
+        get_db_pool.clear()  # MySQL was down: try building the pool again next time
+        return None
+    with slots:
+        try:
+            conn = pool.get_connection()  # reconnects if the pooled connection dropped
+        except Error as e:
+            print(f"Error getting pooled connection: {e}")
+            return None
+        try:
+            if dtype_backend:
+                return pd.read_sql(query, conn, params=params, dtype_backend=dtype_backend)
+            return pd.read_sql(query, conn, params=params)
+        except Error as e:
+            print(f"Error fetching DataFrame: {e}")
+            return None
+        finally:
+            conn.close()  # hands the connection back to the pool
+
+def build_order_filters(channels=None, statuses=None, price_range=None):
+    """
+    Build the WHERE clause and params for the orders queries
+    
+    Empty or None filters are left out. price_range applies to the
+    materialized orders.order_total.
+    """
+    conditions = []
+    params = []
+    if channels:
+        conditions.append(f"c.channel_name IN ({', '.join(['%s'] * len(channels))})")
+        params.extend(channels)
+    if statuses:
+        conditions.append(f"o.status IN ({', '.join(['%s'] * len(statuses))})")
+        params.extend(statuses)
+    if price_range:
+        conditions.append("o.order_total BETWEEN %s AND %s")
+        params.extend(float(p) for p in price_range)
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where_sql, tuple(params)
+
+# Entries kept per data loader; results only change with the data version
+DATA_CACHE_ENTRIES = 32
+
+@st.cache_data(ttl=10, show_spinner=False)
+def get_data_version(refresh_trigger=0):
+    """
+    Cheap fingerprint of the dashboard tables, used as the data caches' key
+    
+    Changes when orders are added, updated or re-totalled, or a channel is
+    edited. Cached for 10s so reruns don't probe MySQL every time. The probe
+    can't see an upsert that only changes a status (orders.updated_at has no
+    ON UPDATE and is taken from the CSV), so refresh_trigger, bumped after
+    every committed upload, is part of the version too. None if MySQL is
+    unreachable.
+    """
+    version = query_df("""
+    SELECT
+        COUNT(*) AS orders,
+        MAX(updated_at) AS orders_updated,
+        SUM(order_total) AS revenue,
+        (SELECT MAX(updated_at) FROM channels) AS channels_updated
+    FROM orders
+    """)
+    if version is None:
+        return None
+    return (refresh_trigger,) + tuple(str(value) for value in version.iloc[0].tolist())
+
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def load_filter_options(data_version=None):
+    """
+    Values for the filter widgets, without loading the orders themselves
+    
+    Returns a dict with channels, statuses, price_min and price_max, or None
+    if the database is unavailable.
+    """
+    try:
+        channels = query_df("""
+        SELECT DISTINCT c.channel_name
+        FROM orders o
+        JOIN channels c ON o.channel_id = c.channel_id
+        ORDER BY c.channel_name
+        """)
+        statuses = query_df("SELECT DISTINCT LOWER(status) AS status FROM orders ORDER BY status")
+        prices = query_df("SELECT MIN(order_total) AS price_min, MAX(order_total) AS price_max FROM orders")
+        
+        if channels is None or statuses is None or prices is None:
+            st.error("Could not connect to database. Please ensure MySQL is running.")
+            return None
+        return {
+            'channels': channels['channel_name'].tolist(),
+            'statuses': statuses['status'].tolist(),
+            'price_min': round(float(prices['price_min'].iloc[0] or 0), 2),
+            'price_max': round(float(prices['price_max'].iloc[0] or 0), 2),
+        }
         
-        if db.connect():
-            # Query to get orders with channel names and totals
-            query = """
-            SELECT 
-                o.order_id,
-                c.channel_name,
-                o.order_date,
-                o.status,
-                SUM(i.quantity * i.unit_price) as order_total
-            FROM orders o
-            JOIN channels c ON o.channel_id = c.channel_id
-            LEFT JOIN items i ON o.order_id = i.order_id
-            GROUP BY o.order_id, c.channel_name, o.order_date, o.status
-            ORDER BY o.order_date DESC
-            """
-            
-            df = db.fetch_df(query)
-            db.disconnect()
-            
-            if df is not None and not df.empty:
-                # Ensure data types
-                df['order_date'] = pd.to_datetime(df['order_date'])
-                df['order_total'] = df['order_total'].fillna(0).astype(float)
-                df['status'] = df['status'].str.lower()
-                return df
+    except Exception as e:
+        st.error(f"Error loading filter options: {e}")
+        return None
+
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def load_filtered_orders(data_version=None, channels=None, statuses=None, price_range=None):
+    """Load orders matching the filters from database, filtered in SQL (no filters = all orders)"""
+    # data_version (from get_data_version) makes the cache miss once the data changes
+    try:
+        where_sql, params = build_order_filters(channels, statuses, price_range)
+        
+        # Orders with channel names; order_total is materialized, so no items join
+        query = f"""
+        SELECT 
+            o.order_id,
+            c.channel_name,
+            o.order_date,
+            LOWER(o.status) AS status,
+            o.order_total
+        FROM orders o
+        JOIN channels c ON o.channel_id = c.channel_id
+        {where_sql}
+        ORDER BY o.order_date DESC
+        """
+        
+        # The one large result: Arrow columns instead of per-cell Python objects
+        df = query_df(query, params, dtype_backend=QUERY_DTYPE_BACKEND)
+        
+        if df is not None:
+            # Ensure data types (an empty result keeps its columns for the charts/table)
+            df['order_date'] = pd.to_datetime(df['order_date'])
+            # float32 halves the column; sums below accumulate in float64
+            df['order_total'] = df['order_total'].fillna(0).astype(np.float32)
+            # Low-cardinality labels: store as int codes instead of per-row strings
+            df['channel_name'] = df['channel_name'].astype('category')
+            df['status'] = df['status'].astype('category')
+            return df
         
         # Fallback to empty dataframe if connection fails
         st.error("Could not connect to database. Please ensure MySQL is running.")
@@ -335,8 +584,75 @@ def load_database_data(refresh_trigger=0):
         st.error(f"Error loading data: {e}")
         return pd.DataFrame()
 
-# Load data from database
-orders_df = load_database_data(st.session_state.refresh_counter)
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def load_order_summary(data_version=None, channels=None, statuses=None, price_range=None):
+    """
+    KPIs and chart counts for the filtered orders, aggregated in SQL
+    
+    Returns (kpis, channel_data, status_data): kpis is a dict of scalars
+    (total_orders, completed, total_revenue), the DataFrames have a 'count'
+    column. Uses the same filters as load_filtered_orders.
+    """
+    kpis = {'total_orders': 0, 'completed': 0, 'total_revenue': 0.0}
+    empty = (kpis,
+             pd.DataFrame(columns=['channel_name', 'count']),
+             pd.DataFrame(columns=['status', 'count']))
+    try:
+        where_sql, params = build_order_filters(channels, statuses, price_range)
+        
+        # One round trip: count and revenue per (channel, status); the KPIs and
+        # both charts are rolled up from these few rows
+        query = f"""
+        SELECT 
+            c.channel_name,
+            LOWER(o.status) AS status,
+            COUNT(*) AS count,
+            SUM(o.order_total) AS revenue
+        FROM orders o
+        JOIN channels c ON o.channel_id = c.channel_id
+        {where_sql}
+        GROUP BY c.channel_name, LOWER(o.status)
+        """
+        summary = query_df(query, params)
+        
+        if summary is None:
+            return empty
+        kpis = {
+            'total_orders': int(summary['count'].sum()),
+            'completed': int(summary.loc[summary['status'] == 'completed', 'count'].sum()),
+            'total_revenue': float(summary['revenue'].astype(float).sum()),
+        }
+        channel_data = summary.groupby('channel_name', as_index=False)['count'].sum()
+        status_data = summary.groupby('status', as_index=False)['count'].sum()
+        return kpis, channel_data, status_data
+        
+    except Exception as e:
+        st.error(f"Error loading summary data: {e}")
+        return empty
+
+@st.cache_data
+def build_channel_chart_spec(rows):
+    """Vega-Lite spec of the orders-by-channel bar chart for (channel_name, count) rows"""
+    data = pd.DataFrame(list(rows), columns=['channel_name', 'count'])
+    return alt.Chart(data).mark_bar().encode(
+        x='channel_name:N',
+        y='count:Q',
+        color=alt.Color('channel_name:N', scale=alt.Scale(scheme='category10')),
+        opacity=alt.value(0.8)
+    ).properties(height=280, width=200).interactive().to_dict()
+
+@st.cache_data
+def build_status_chart_spec(rows):
+    """Vega-Lite spec of the orders-by-status pie chart for (status, count) rows"""
+    data = pd.DataFrame(list(rows), columns=['status', 'count'])
+    return alt.Chart(data).mark_arc().encode(
+        theta='count:Q',
+        color=alt.Color('status:N', scale=alt.Scale(scheme='set2'))
+    ).properties(height=280, width=200).interactive().to_dict()
+
+# Load filter widget values from database (the orders are queried per filter below)
+data_version = get_data_version(st.session_state.refresh_counter)
+filter_options = load_filter_options(data_version)
 
 # ============================================================================
 # MAIN CONTENT
@@ -353,14 +669,19 @@ with col_export:
         st.session_state.export_triggered = True
 
 try:
-    if orders_df is not None and not orders_df.empty:
+    if filter_options and filter_options['channels']:
+        price_min = filter_options['price_min']
+        price_max = filter_options['price_max']
+        channel_opts = filter_options['channels']
+        status_opts = filter_options['statuses']
+        
         # Initialize saved filter values at the start
         if 'saved_channels' not in st.session_state:
-            st.session_state.saved_channels = list(orders_df['channel_name'].unique())
+            st.session_state.saved_channels = channel_opts
         if 'saved_status' not in st.session_state:
-            st.session_state.saved_status = list(orders_df['status'].unique())
+            st.session_state.saved_status = status_opts
         if 'saved_price_range' not in st.session_state:
-            st.session_state.saved_price_range = (float(orders_df['order_total'].min()), float(orders_df['order_total'].max()))
+            st.session_state.saved_price_range = (price_min, price_max)
         
         # Filter controls - compact
         col1, col2, col3 = st.columns(3)
@@ -368,134 +689,113 @@ try:
         with col1:
             selected_channels = st.multiselect(
                 "Channels",
-                options=orders_df['channel_name'].unique(),
+                options=channel_opts,
                 default=st.session_state.saved_channels,
                 key="channel_filter"
             )
-            st.session_state.saved_channels = selected_channels if selected_channels else list(orders_df['channel_name'].unique())
+            st.session_state.saved_channels = selected_channels if selected_channels else channel_opts
         
         with col2:
             selected_status = st.multiselect(
                 "Statuses",
-                options=orders_df['status'].unique(),
+                options=status_opts,
                 default=st.session_state.saved_status,
                 key="status_filter"
             )
-            st.session_state.saved_status = selected_status if selected_status else list(orders_df['status'].unique())
+            st.session_state.saved_status = selected_status if selected_status else status_opts
         
         with col3:
             price_range = st.slider(
                 "Price Range ($)",
-                min_value=float(orders_df['order_total'].min()),
-                max_value=float(orders_df['order_total'].max()),
+                min_value=price_min,
+                max_value=price_max,
                 value=st.session_state.saved_price_range,
                 key="price_filter"
             )
             st.session_state.saved_price_range = price_range
         
-        # Apply all filters using saved values
-        filtered_df = orders_df[
-            (orders_df['channel_name'].isin(st.session_state.saved_channels)) &
-            (orders_df['status'].isin(st.session_state.saved_status)) &
-            (orders_df['order_total'] >= st.session_state.saved_price_range[0]) &
-            (orders_df['order_total'] <= st.session_state.saved_price_range[1])
-        ]
-        
-        # Store filtered_df in session state for export
-        st.session_state.filtered_df = filtered_df
-        
-        # Handle PDF export if triggered (with filtered data)
+        # Filtered orders and their SQL aggregates, kept in session state per filter
+        # combination so reruns that don't touch the filters (export, theme, ...)
+        # skip the st.cache_data lookup and its DataFrame copy
+        filter_key = (
+            data_version,
+            tuple(sorted(st.session_state.saved_channels)),
+            tuple(sorted(st.session_state.saved_status)),
+            tuple(st.session_state.saved_price_range),
+        )
+        if st.session_state.get('_cached_filter_key') != filter_key:
+            st.session_state._cached_filtered_df = load_filtered_orders(*filter_key)
+            st.session_state._cached_summary = load_order_summary(*filter_key)
+            st.session_state._cached_filter_key = filter_key
+        filtered_df = st.session_state._cached_filtered_df
+        kpis, channel_data, status_data = st.session_state._cached_summary
+        total_orders = kpis['total_orders']
+        total_revenue = kpis['total_revenue']
+        completed_pct = (kpis['completed'] / total_orders * 100) if total_orders > 0 else 0
+        avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+        
+        # PDF export runs on a background worker, so this rerun (and the ones
+        # after it) stay responsive; the same view is only rendered once,
+        # whichever session asked for it first
         if st.session_state.export_triggered:
-            st.info("Generating PDF...")
-            
-            try:
-                # Use filtered_df from session state
-                export_df = st.session_state.get('filtered_df', orders_df)
-                
-                # Take screenshot
-                screenshot_path = None
-                try:
-                    with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-                        screenshot_path = tmp.name
-                    success = take_dashboard_screenshot("http://localhost:8501", screenshot_path)
-                    if not success or not os.path.exists(screenshot_path):
-                        screenshot_path = None
-                except Exception as e:
-                    screenshot_path = None
-                
-                # Prepare metrics data FROM FILTERED DF
-                total_orders = len(export_df)
-                completed = len(export_df[export_df['status'] == 'completed'])
-                completed_pct = (completed / total_orders * 100) if total_orders > 0 else 0
-                total_revenue = export_df['order_total'].sum()
-                avg_order_value = export_df['order_total'].mean() if total_orders > 0 else 0
-                
+            st.session_state.export_triggered = False
+            if st.session_state.get('pdf_key') != filter_key:
+                # Metrics and chart data from the same SQL aggregates as the page
                 metrics = {
                     'total_orders': total_orders,
                     'completed_pct': completed_pct,
                     'total_revenue': total_revenue,
                     'avg_order_value': avg_order_value,
                 }
-                
-                # Prepare chart data FROM FILTERED DF
-                channel_dist = export_df.groupby('channel_name').size()
-                status_dist = export_df.groupby('status').size()
-                
                 chart_data = {
-                    'channel_dist': channel_dist,
-                    'status_dist': status_dist,
+                    'channel_dist': channel_data.set_index('channel_name')['count'],
+                    'status_dist': status_data.set_index('status')['count'],
                 }
-                
-                # Generate PDF with FILTERED DATA
-                exporter = DashboardExporter()
-                pdf_bytes = exporter.export_dashboard_pdf(metrics, chart_data, export_df, screenshot_path)
-                
+                future = submit_export(filter_key, metrics, chart_data, filtered_df)
+                st.session_state.export_job = (filter_key, future)
+        
+        job = st.session_state.export_job
+        if job is not None and not job[1].done():
+            export_progress()
+        elif job is not None:
+            st.session_state.export_job = None
+            try:
+                pdf_bytes = job[1].result()
                 if pdf_bytes:
-                    pdf_filename = f"Dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-                    
-                    st.download_button(
-                        label="Download PDF",
-                        data=pdf_bytes,
-                        file_name=pdf_filename,
-                        mime="application/pdf"
-                    )
-                    st.success(f"PDF ready! Rows: {len(export_df)} | Size: {len(pdf_bytes) / 1024:.1f} KB")
+                    st.session_state.pdf_key = job[0]
+                    st.session_state.pdf_data = pdf_bytes
+                    st.session_state.pdf_filename = f"Dashboard_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
                 else:
                     st.error("PDF generation returned empty data")
-                
-                # Cleanup
-                if screenshot_path and os.path.exists(screenshot_path):
-                    try:
-                        os.remove(screenshot_path)
-                    except:
-                        pass
-                
             except Exception as e:
                 st.error(f"Error: {str(e)}")
                 import traceback
                 st.error(traceback.format_exc())
-            
-            # Reset trigger
-            st.session_state.export_triggered = False
+        
+        # Download for the current view, kept until the filters or data change
+        if st.session_state.pdf_data and st.session_state.get('pdf_key') == filter_key:
+            st.download_button(
+                label="Download PDF",
+                data=st.session_state.pdf_data,
+                file_name=st.session_state.pdf_filename,
+                mime="application/pdf"
+            )
+            st.success(f"PDF ready! Rows: {len(filtered_df)} | Size: {len(st.session_state.pdf_data) / 1024:.1f} KB")
         
         # Key metrics (compact)
         kpi_col1, kpi_col2, kpi_col3, kpi_col4 = st.columns(4)
         
         with kpi_col1:
-            st.metric("Orders", f"{len(filtered_df):,}")
+            st.metric("Orders", f"{total_orders:,}")
         
         with kpi_col2:
-            completed = len(filtered_df[filtered_df['status'] == 'completed'])
-            pct = f"{(completed/len(filtered_df)*100):.0f}%" if len(filtered_df) > 0 else "0%"
-            st.metric("Completed", pct)
+            st.metric("Completed", f"{completed_pct:.0f}%")
         
         with kpi_col3:
-            total_revenue = filtered_df['order_total'].sum()
             st.metric("Revenue", f"${total_revenue:,.2f}")
         
         with kpi_col4:
-            avg_order = filtered_df['order_total'].mean()
-            st.metric("Avg Value", f"${avg_order:,.2f}" if len(filtered_df) > 0 else "$0.00")
+            st.metric("Avg Value", f"${avg_order_value:,.2f}")
         
         st.divider()
         
@@ -508,40 +808,51 @@ try:
             
             with col1:
                 st.caption("Orders by Channel")
-                channel_data = filtered_df.groupby('channel_name').size().reset_index(name='count')
                 
-                channel_chart = alt.Chart(channel_data).mark_bar().encode(
-                    x='channel_name:N',
-                    y='count:Q',
-                    color=alt.Color('channel_name:N', scale=alt.Scale(scheme='category10')),
-                    opacity=alt.value(0.8)
-                ).properties(height=280, width=200).interactive()
-                
-                st.altair_chart(channel_chart, use_container_width=True)
+                # Specs are cached on the (label, count) rows, so unchanged
+                # aggregates skip building and serializing the chart again
+                channel_spec = build_channel_chart_spec(
+                    tuple(channel_data.itertuples(index=False, name=None))
+                )
+                st.vega_lite_chart(channel_spec, use_container_width=True)
             
             with col2:
                 st.caption("Orders by Status")
-                status_data = filtered_df.groupby('status').size().reset_index(name='count')
-                
-                status_chart = alt.Chart(status_data).mark_arc().encode(
-                    theta='count:Q',
-                    color=alt.Color('status:N', scale=alt.Scale(scheme='set2'))
-                ).properties(height=280, width=200).interactive()
                 
-                st.altair_chart(status_chart, use_container_width=True)
+                status_spec = build_status_chart_spec(
+                    tuple(status_data.itertuples(index=False, name=None))
+                )
+                st.vega_lite_chart(status_spec, use_container_width=True)
         
         with table_col:
             st.caption("Orders")
             
             display_cols = ['order_id', 'channel_name', 'status', 'order_total']
-            # Calculate dynamic height based on number of rows (30px per row + header)
-            table_height = min(max(len(filtered_df) * 30 + 30, 150), 380)
+            
+            # Page server-side: only the current slice goes to the browser
+            # (rows are already sorted by order_date in SQL)
+            page_count = max(math.ceil(len(filtered_df) / TABLE_PAGE_SIZE), 1)
+            if st.session_state.get('orders_page', 1) > page_count:
+                st.session_state.orders_page = page_count  # filters shrank the result
+            page = 1
+            if page_count > 1:
+                page = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="orders_page")
+            start = (page - 1) * TABLE_PAGE_SIZE
+            page_df = filtered_df.head(TABLE_PAGE_SIZE) if page == 1 else filtered_df.iloc[start:start + TABLE_PAGE_SIZE]
+            # Calculate dynamic height based on the rows shown (30px per row + header)
+            table_height = min(max(len(page_df) * 30 + 30, 150), 380)
+            
             st.dataframe(
-                filtered_df[display_cols],
+                page_df[display_cols],
                 use_container_width=True,
                 hide_index=True,
-                height=table_height
+                height=table_height,
+                column_config={
+                    "order_total": st.column_config.NumberColumn("order_total", format="dollar"),
+                }
             )
+            if page_count > 1:
+                st.caption(f"Rows {start + 1:,}-{start + len(page_df):,} of {len(filtered_df):,} (page {page} of {page_count:,})")
     else:
         st.info("No data available.")
 
@@ -1,34 +1,137 @@
 """
 DataLoader: Load and manage CSV files with backup functionality
 """
+import io
+import json
 import pandas as pd
 import os
 from datetime import datetime
 import streamlit as st
-from .config import BASE_DIR
+from .config import BASE_DIR, FILE_CONFIG
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Column types of the web/app order exports, for DataLoader.load(dtype=..., parse_dates=...)
+ORDER_DTYPES = {'order_id': 'int64', 'channel_id': 'int32', 'status': 'category'}
+ORDER_PARSE_DATES = ['order_date', 'updated_at']
+
+# Order export paths that DataLoader.load reads with the order types by default
+ORDER_SOURCES = {FILE_CONFIG['web'], FILE_CONFIG['app']}
+
+# Parquet schema metadata key recording what the side cache was built from
+_CACHE_KEY_FIELD = b'orders_dashboard.cache_key'
+
+
+def _sniff_sep(header):
+    """Field separator of a CSV from its header line (',' unless ';' is more common)"""
+    return ';' if header.count(';') > header.count(',') else ','
+
+
+def _parquet_cache_path(local_path):
+    return os.path.splitext(local_path)[0] + '.parquet'
+
+
+def _cache_key(file_version, dtype, parse_dates):
+    """
+    Identify a parse: the CSV's (mtime_ns, size) plus the read options
+
+    A cached copy only serves reads with the same key, so a rewritten or
+    restored CSV, or a typed read after an untyped one, parses again.
+    """
+    return json.dumps({
+        'file_version': list(file_version),
+        'dtype': sorted((col, str(t)) for col, t in (dtype or {}).items()),
+        'parse_dates': list(parse_dates or []),
+    }).encode()
+
+
+def _write_parquet_cache(df, local_path, cache_key):
+    """Save df as the .parquet copy of local_path, tagged with cache_key (best effort)"""
+    if PARQUET_AVAILABLE:
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[_CACHE_KEY_FIELD] = cache_key
+            pq.write_table(table.replace_schema_metadata(metadata), _parquet_cache_path(local_path))
+        except Exception:
+            pass  # cache is best effort (read-only dir, mixed-type columns)
+
+
+def _read_parquet_cache(local_path, cache_key):
+    """The cached DataFrame if its key matches cache_key, else None"""
+    cache_path = _parquet_cache_path(local_path)
+    if not (PARQUET_AVAILABLE and os.path.exists(cache_path)):
+        return None
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+        if metadata.get(_CACHE_KEY_FIELD) != cache_key:
+            return None  # stale, or written for other read options
+        return pq.read_table(cache_path).to_pandas()
+    except Exception:
+        return None  # unreadable cache, fall back to the CSV
+
+
+@st.cache_data(show_spinner=False)
+def _read_local_csv(local_path, file_version, dtype=None, parse_dates=None):
+    """
+    Parse a local CSV file (comma or semicolon, sniffed from the header)
+
+    Cached on (path, file_version) so reruns skip parsing while the file is
+    unchanged; file_version is the file's (mtime_ns, size). Across restarts a
+    .parquet copy next to the CSV is used when it was built from this
+    file_version with the same dtype / parse_dates.
+    """
+    cache_key = _cache_key(file_version, dtype, parse_dates)
+    cached = _read_parquet_cache(local_path, cache_key)
+    if cached is not None:
+        return cached
+    
+    with open(local_path, newline='', encoding='utf-8', errors='replace') as f:
+        sep = _sniff_sep(f.readline())
+    # Typed columns are converted by the C parser instead of inferred afterwards
+    df = pd.read_csv(local_path, sep=sep, dtype=dtype, parse_dates=parse_dates, engine='c')
+    
+    _write_parquet_cache(df, local_path, cache_key)
+    return df
 
 
 class DataLoader:
     """Handles CSV file loading, uploading, and backup creation"""
     
     @staticmethod
-    def load(uploaded_file, local_path, source_label):
+    def load(uploaded_file, local_path, source_label, dtype=None, parse_dates=None):
         """
         Load data from either uploaded file or local path
         
+        The configured order exports (ORDER_SOURCES) are read with
+        ORDER_DTYPES / ORDER_PARSE_DATES unless dtype or parse_dates is given.
+        
         Args:
             uploaded_file: Streamlit uploaded file object (or None)
             local_path: Path to local CSV file
             source_label: Label for logging/UI messages
+            dtype: Optional column dtypes for read_csv (e.g. ORDER_DTYPES)
+            parse_dates: Optional date columns for read_csv (e.g. ORDER_PARSE_DATES)
             
         Returns:
             pd.DataFrame: Loaded data or empty DataFrame
         """
+        if dtype is None and parse_dates is None and str(local_path) in ORDER_SOURCES:
+            dtype, parse_dates = ORDER_DTYPES, ORDER_PARSE_DATES
+        
         # --- A. CÓ FILE UPLOAD MỚI ---
         if uploaded_file is not None:
             try:
-                # 1. Đọc file
-                df_new = pd.read_csv(uploaded_file)
+                # 1. Đọc file (raw bytes are kept to be written back as-is)
+                raw = uploaded_file.getvalue()
+                header = raw[:raw.find(b'\n')].decode('utf-8', errors='replace')
+                df_new = pd.read_csv(io.BytesIO(raw), sep=_sniff_sep(header), dtype=dtype,
+                                     parse_dates=parse_dates, engine='c')
                 
                 # 2. Backup file cũ
                 if os.path.exists(local_path):
@@ -38,8 +141,14 @@ class DataLoader:
                     os.rename(local_path, backup_path)
                     st.toast(f"📦 Đã backup: {backup_name}")
 
-                # 3. Ghi đè file mới
-                df_new.to_csv(local_path, index=False)
+                # 3. Ghi đè file mới: the uploaded bytes, no DataFrame -> CSV re-encode;
+                # the parquet copy (keyed on the written file) lets the next
+                # local load with the same options skip parsing
+                with open(local_path, 'wb') as f:
+                    f.write(raw)
+                stat = os.stat(local_path)
+                _write_parquet_cache(df_new, local_path,
+                                     _cache_key((stat.st_mtime_ns, stat.st_size), dtype, parse_dates))
                 st.success(f"✅ Đã cập nhật: {source_label}")
                 return df_new
             except Exception as e:
@@ -49,13 +158,11 @@ class DataLoader:
         # --- B. DÙNG FILE LOCAL ---
         elif os.path.exists(local_path):
             try:
-                return pd.read_csv(local_path)
-            except:
-                try:
-                    return pd.read_csv(local_path, sep=';')
-                except Exception as e:
-                    st.error(f"Lỗi đọc file: {e}")
-                    return pd.DataFrame()
+                stat = os.stat(local_path)
+                return _read_local_csv(local_path, (stat.st_mtime_ns, stat.st_size), dtype, parse_dates)
+            except Exception as e:
+                st.error(f"Lỗi đọc file: {e}")
+                return pd.DataFrame()
         
         # --- C. KHÔNG CÓ DATA ---
         else:
@@ -39,9 +39,13 @@ class DataWarehouse:
         # 2. Deduplicate (Lấy updated_at mới nhất)
         if 'updated_at' in raw_orders.columns:
             raw_orders['updated_at'] = pd.to_datetime(raw_orders['updated_at'])
-            raw_orders = raw_orders.sort_values('updated_at', ascending=False)
-        
-        orders = raw_orders.drop_duplicates(subset=['order_id'], keep='first')
+            # One hash-grouped scan for each order's latest row instead of a full sort;
+            # missing timestamps rank lowest, as they did at the end of the sort
+            latest = raw_orders['updated_at'].fillna(pd.Timestamp.min)
+            latest_idx = latest.groupby(raw_orders['order_id'], sort=False).idxmax()
+            orders = raw_orders.loc[latest_idx.to_numpy()]
+        else:
+            orders = raw_orders.drop_duplicates(subset=['order_id'], keep='first')
         
         # Convert date column
         if 'order_date' in orders.columns:
@@ -49,15 +53,28 @@ class DataWarehouse:
 
         # 3. Join Items table
         if not items_df.empty:
-            full_data = orders.merge(items_df, on='order_id', how='left')
+            # orders are unique per order_id after dedup; sort=False keeps the order rows' order
+            full_data = orders.merge(items_df, on='order_id', how='left', sort=False, validate='1:m')
         else:
             full_data = orders
             full_data[['quantity', 'unit_price']] = 0
 
         # 4. Join Channels table
         if not channels_df.empty:
-            full_data = full_data.merge(channels_df, on='channel_id', how='left')
+            # Small dimension table: map each column by channel_id instead of a full merge
+            lookup = channels_df.drop_duplicates('channel_id').set_index('channel_id')
+            channel_ids = full_data['channel_id']
+            for col in lookup.columns:
+                full_data[col] = channel_ids.map(lookup[col])
         
         # 5. Calculate derived fields
-        full_data['line_total'] = full_data['quantity'] * full_data['unit_price']
+        full_data['line_total'] = full_data['quantity'].to_numpy() * full_data['unit_price'].to_numpy()
+        
+        # Low-cardinality labels as categoricals (int codes for ==, groupby),
+        # plus a precomputed completed flag for the KPI filters
+        for col in ('channel_name', 'status'):
+            if col in full_data.columns:
+                full_data[col] = full_data[col].astype('category')
+        if 'status' in full_data.columns:
+            full_data['is_completed'] = (full_data['status'] == 'completed').to_numpy()
         self.merged_data = full_data
@@ -1,8 +1,18 @@
 """
 Database Schema: Create and initialize MySQL schema
 """
+import os
 from mysql_connector import MySQLConnector
 
+# Column types of the CSV files per table, so pandas skips type inference on every
+# chunk (used by MySQLDataLoader and the csv_insert CLI)
+CSV_DTYPES = {
+    "channels": {"channel_id": "int64", "channel_name": "str"},
+    "orders": {"order_id": "int64", "channel_id": "int64", "order_date": "str",
+               "status": "str", "updated_at": "str"},
+    "items": {"sku": "str", "unit_price": "float64"},
+}
+
 
 class DatabaseSchema:
     """Create and manage database schema"""
@@ -30,11 +40,13 @@ class DatabaseSchema:
             channel_id INT,
             channel_name VARCHAR(100),
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (channel_id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """
         
-        # 2. Orders table (combines orders_app and orders_web)
+        # 2. Orders table (combines orders_app and orders_web); order_total is
+        # SUM(quantity * unit_price) of its items, kept by refresh_order_totals
         orders_table = """
         CREATE TABLE IF NOT EXISTS orders (
             order_id INT,
@@ -42,20 +54,27 @@ class DatabaseSchema:
             order_date DATE,
             status VARCHAR(50),
             updated_at DATETIME,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            order_total DECIMAL(12, 2) NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (order_id),
+            KEY idx_orders_date (order_date DESC),
+            KEY idx_orders_channel (channel_id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """
         
-        # 3. Items table
+        # 3. Items table (item_id is generated for rows inserted without one;
+        # (order_id, quantity, unit_price) covers the per-order totals)
         items_table = """
         CREATE TABLE IF NOT EXISTS items (
-            item_id INT,
+            item_id INT AUTO_INCREMENT,
             order_id INT,
             sku VARCHAR(50),
             quantity INT,
             unit_price DECIMAL(10, 2),
             total_price DECIMAL(10, 2),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (item_id),
+            KEY idx_items_order_totals (order_id, quantity, unit_price)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """
         
@@ -89,7 +108,124 @@ class DatabaseSchema:
                 print(f"✗ Error creating table '{table_name}': {e}")
                 return False
         
-        return True
+        # CREATE TABLE IF NOT EXISTS leaves tables from an older schema as they are
+        return DatabaseSchema.migrate_schema(connector, dict(tables))
+    
+    # Columns copied when a table from the old schema (no primary key) is rebuilt;
+    # the first one is the key, except for items, whose item_id is regenerated
+    MIGRATION_COPY_COLUMNS = {
+        'channels': ['channel_id', 'channel_name', 'created_at', 'updated_at'],
+        'orders': ['order_id', 'channel_id', 'order_date', 'status', 'updated_at', 'created_at'],
+        'items': ['order_id', 'sku', 'quantity', 'unit_price', 'total_price', 'created_at'],
+    }
+    
+    # Secondary indexes added to existing tables that lack them
+    MIGRATION_INDEXES = {
+        'orders': {
+            'idx_orders_date': "KEY idx_orders_date (order_date DESC)",
+            'idx_orders_channel': "KEY idx_orders_channel (channel_id)",
+        },
+        'items': {
+            'idx_items_order_totals': "KEY idx_items_order_totals (order_id, quantity, unit_price)",
+        },
+    }
+    
+    @staticmethod
+    def _schema_has(connector: MySQLConnector, query: str, params: tuple) -> bool:
+        return connector.execute_query_scalar(query, params) is not None
+    
+    @staticmethod
+    def _has_index(connector: MySQLConnector, table: str, index: str) -> bool:
+        return DatabaseSchema._schema_has(connector, """
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+        """, (table, index))
+    
+    @staticmethod
+    def _has_column(connector: MySQLConnector, table: str, column: str) -> bool:
+        return DatabaseSchema._schema_has(connector, """
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+        """, (table, column))
+    
+    @staticmethod
+    def _rebuild_table(connector: MySQLConnector, table: str, table_sql: str) -> bool:
+        """
+        Recreate a table from the old schema with the current definition
+        
+        Rows are copied over in updated_at / created_at order, so for a
+        duplicated key the latest row wins (the old tables had no primary key
+        to stop duplicates).
+        """
+        old_table = f"{table}_premigration"
+        columns = DatabaseSchema.MIGRATION_COPY_COLUMNS[table]
+        column_list = ", ".join(columns)
+        if table == 'items':
+            upsert = ""
+        else:
+            upsert = "ON DUPLICATE KEY UPDATE " + ", ".join(
+                f"{col} = VALUES({col})" for col in columns[1:]
+            )
+        order_by = "updated_at, created_at" if 'updated_at' in columns else "created_at"
+        return (
+            connector.execute_query(f"DROP TABLE IF EXISTS {old_table}")
+            and connector.execute_query(f"RENAME TABLE {table} TO {old_table}")
+            and connector.execute_query(table_sql)
+            and connector.execute_query(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {column_list} FROM {old_table}
+            ORDER BY {order_by}
+            {upsert}
+            """)
+            and connector.execute_query(f"DROP TABLE {old_table}")
+        )
+    
+    @staticmethod
+    def migrate_schema(connector: MySQLConnector, table_sql: dict) -> bool:
+        """
+        Bring tables created by an older schema up to the current one (idempotent)
+        
+        Tables without their primary key are rebuilt (deduplicating on the key);
+        a missing orders.order_total column or secondary index is added in
+        place. Order totals are recomputed when orders changed.
+        
+        Args:
+            table_sql: CREATE TABLE statement per table name
+        """
+        try:
+            totals_stale = False
+            for table in DatabaseSchema.MIGRATION_COPY_COLUMNS:
+                if DatabaseSchema._has_index(connector, table, 'PRIMARY'):
+                    continue
+                print(f"Migrating table '{table}' to the current schema...")
+                if not DatabaseSchema._rebuild_table(connector, table, table_sql[table]):
+                    print(f"✗ Error migrating table '{table}'")
+                    return False
+                totals_stale = True
+            
+            if not DatabaseSchema._has_column(connector, 'orders', 'order_total'):
+                print("Adding column 'orders.order_total'...")
+                if not connector.execute_query(
+                    "ALTER TABLE orders ADD COLUMN order_total DECIMAL(12, 2) NOT NULL DEFAULT 0 AFTER updated_at"
+                ):
+                    return False
+                totals_stale = True
+            
+            for table, indexes in DatabaseSchema.MIGRATION_INDEXES.items():
+                for index, definition in indexes.items():
+                    if not DatabaseSchema._has_index(connector, table, index):
+                        print(f"Adding index '{index}' on '{table}'...")
+                        if not connector.execute_query(f"ALTER TABLE {table} ADD {definition}"):
+                            return False
+            
+            if totals_stale:
+                return DatabaseSchema.refresh_order_totals(connector)
+            return True
+        except Exception as e:
+            print(f"✗ Error migrating schema: {e}")
+            return False
     
     @staticmethod
     def create_views(connector: MySQLConnector) -> bool:
@@ -105,11 +241,11 @@ class DatabaseSchema:
             o.order_date,
             o.status,
             COUNT(i.item_id) as item_count,
-            SUM(i.total_price) as order_total
+            o.order_total
         FROM orders o
         LEFT JOIN channels c ON o.channel_id = c.channel_id
         LEFT JOIN items i ON o.order_id = i.order_id
-        GROUP BY o.order_id, o.channel_id, c.channel_name, o.order_date, o.status
+        GROUP BY o.order_id, o.channel_id, c.channel_name, o.order_date, o.status, o.order_total
         """
         
         try:
@@ -119,3 +255,65 @@ class DatabaseSchema:
         except Exception as e:
             print(f"✗ Error creating view: {e}")
             return False
+    
+    @staticmethod
+    def refresh_order_totals(connector: MySQLConnector, order_ids: list = None,
+                             page_size: int = 1000) -> bool:
+        """
+        Recompute orders.order_total from items
+        
+        With order_ids only those orders are updated (in pages of page_size),
+        otherwise every order is.
+        """
+        update_sql = """
+        UPDATE orders o
+        LEFT JOIN (
+            SELECT order_id, SUM(quantity * unit_price) AS total
+            FROM items
+            {items_where}
+            GROUP BY order_id
+        ) t ON t.order_id = o.order_id
+        SET o.order_total = COALESCE(t.total, 0)
+        {orders_where}
+        """
+        if order_ids is None:
+            return connector.execute_query(update_sql.format(items_where="", orders_where=""))
+        
+        order_ids = list(dict.fromkeys(int(order_id) for order_id in order_ids))
+        for start in range(0, len(order_ids), page_size):
+            page = order_ids[start:start + page_size]
+            placeholders = ", ".join(["%s"] * len(page))
+            query = update_sql.format(
+                items_where=f"WHERE order_id IN ({placeholders})",
+                orders_where=f"WHERE o.order_id IN ({placeholders})"
+            )
+            if not connector.execute_query(query, tuple(page) * 2):
+                return False
+        return True
+    
+    @staticmethod
+    def analyze_tables(connector: MySQLConnector) -> bool:
+        """Refresh index statistics after a bulk load so the optimizer uses the new keys"""
+        # ANALYZE TABLE returns a status result set, so read it with fetch_all
+        return connector.fetch_all("ANALYZE TABLE channels, orders, items") is not None
+    
+    @staticmethod
+    def bulk_load_csv(connector: MySQLConnector, csv_path: str, table: str, columns: list = None) -> bool:
+        """
+        Stream a CSV file with a header row into table via LOAD DATA LOCAL INFILE
+        
+        columns defaults to the file's header; the header line itself is skipped.
+        The line terminator (LF or CRLF) is taken from the header line.
+        """
+        try:
+            # newline='' keeps a CRLF ending visible instead of translating it
+            with open(csv_path, encoding='utf-8', newline='') as f:
+                header = f.readline()
+            line_terminator = '\r\n' if header.endswith('\r\n') else '\n'
+            if columns is None:
+                columns = [col.strip() for col in header.split(',')]
+            return connector.load_data_infile(os.path.abspath(csv_path), table, columns, ignore_lines=1,
+                                              line_terminator=line_terminator)
+        except Exception as e:
+            print(f"✗ Error bulk loading '{csv_path}' into '{table}': {e}")
+            return False
@@ -3,12 +3,14 @@
 Initialize MySQL Database: Run this script to set up the database schema
 Usage: python -m src.init_database
        OR from src/: python init_database.py
+       Add --migrate to upgrade an existing database in place instead of recreating it
 """
 
 from mysql_connector import MySQLConnector
 from database_schema import DatabaseSchema
 from mysql_data_loader import MySQLDataLoader
 import os
+import sys
 
 
 def init_database(host="localhost", user="root", password="root", database="orders_dashboard"):
@@ -64,37 +66,29 @@ def init_database(host="localhost", user="root", password="root", database="orde
     loader = MySQLDataLoader(host, user, password, database)
     loader.connector = connector  # Reuse connection
     
-    csv_files = {
-        'data/channels.csv': 'channels',
-        'data/items.csv': 'items',
-        'data/orders_app.csv': 'orders',
-        'data/orders_web.csv': 'orders'
-    }
-    
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Go up to project root
     
-    for csv_file, file_type in csv_files.items():
+    def csv_source(csv_file):
+        """Absolute path of a seed file, or None (skipped) if it is missing"""
         csv_path = os.path.join(base_dir, csv_file)
         if os.path.exists(csv_path):
-            print(f"\n  Loading {csv_file}...")
-            try:
-                df = loader.load_csv_to_dataframe(csv_path)
-                if not df.empty:
-                    if file_type == 'channels':
-                        success, message = loader.load_channels(df, csv_file)
-                    elif file_type == 'orders':
-                        success, message = loader.load_orders(df, csv_file)
-                    elif file_type == 'items':
-                        success, message = loader.load_items(df, csv_file)
-                    
-                    if success:
-                        print(f"    {message}")
-                    else:
-                        print(f"    ✗ {message}")
-            except Exception as e:
-                print(f"    ✗ Error: {e}")
-        else:
-            print(f"  ⚠ File not found: {csv_file}")
+            return csv_path
+        print(f"  ⚠ File not found: {csv_file}")
+        return None
+    
+    # One transaction for all seed files. The loaders bulk load each file
+    # (orders through the staged upsert, so a repeated order_id keeps its
+    # last row), drop invalid item rows, keep the order totals current and
+    # log each import
+    success, message = loader.load_all(
+        csv_source('data/channels.csv'),
+        [csv_source('data/orders_app.csv'), csv_source('data/orders_web.csv')],
+        csv_source('data/items.csv')
+    )
+    print(f"    {message}" if success else f"    ✗ {message}")
+    
+    if DatabaseSchema.analyze_tables(connector):
+        print("\n  Index statistics updated")
     
     # Step 6: Display statistics
     print("\n[6] Database Statistics:")
@@ -111,5 +105,21 @@ def init_database(host="localhost", user="root", password="root", database="orde
     return True
 
 
+def migrate_database(host="localhost", user="root", password="root", database="orders_dashboard"):
+    """Upgrade an existing database to the current schema, keeping its data"""
+    connector = MySQLConnector(host, user, password, database)
+    if not connector.connect():
+        print("✗ Failed to connect to MySQL")
+        return False
+    # create_schema adds missing tables, then migrates the existing ones
+    success = DatabaseSchema.create_schema(connector) and DatabaseSchema.create_views(connector)
+    connector.disconnect()
+    print("Schema is up to date" if success else "✗ Schema migration failed")
+    return success
+
+
 if __name__ == "__main__":
-    init_database(host="localhost", user="root", password="", database="orders_dashboard")
+    if "--migrate" in sys.argv[1:]:
+        migrate_database(host="localhost", user="root", password="", database="orders_dashboard")
+    else:
+        init_database(host="localhost", user="root", password="", database="orders_dashboard")
@@ -1,6 +1,9 @@
 """
 KPIAnalyzer: Calculate key performance indicators and metrics
 """
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 
 
@@ -9,44 +12,75 @@ class KPIAnalyzer:
     Analytics Layer: Calculate KPIs, metrics, and provide filtering
     """
     
+    # Filtered analyzers kept per analyzer (each holds a filtered frame)
+    FILTER_CACHE_ENTRIES = 4
+    
     def __init__(self, df):
         """
         Initialize analyzer with data
         
         Args:
-            df: DataFrame with order data
+            df: DataFrame with order data (treated as read-only)
         """
         self.df = df
+        self._cache = {}
+        self._filters = OrderedDict()  # LRU of filter() results
+
+    def _memo(self, key, compute):
+        """Return the cached result for key, computing it on first use"""
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def _completed(self):
+        """Boolean mask of completed rows (uses the warehouse's is_completed flag when present)"""
+        def compute():
+            if 'is_completed' in self.df.columns:
+                return self.df['is_completed'].to_numpy()
+            return (self.df['status'] == 'completed').to_numpy()
+        return self._memo('completed', compute)
 
     def get_metrics(self):
         """
-        Calculate 5 key business metrics
+        Calculate 5 key business metrics (cached per analyzer)
         
         Returns:
             tuple: (revenue, return_rate, aov, cancel_rate, best_sku)
         """
+        return self._memo('metrics', self._compute_metrics)
+
+    def _compute_metrics(self):
         if self.df.empty: 
             return 0, 0, 0, 0, "N/A"
         
-        valid_orders = self.df[self.df['status'] == 'completed']
+        # One grouped pass over status for the revenue / quantity / order counts
+        by_status = self.df.groupby('status', observed=True).agg(
+            line_total=('line_total', 'sum'),
+            qty=('quantity', 'sum'),
+            orders=('order_id', 'nunique')
+        )
+        
+        def status_total(status, column):
+            return by_status.at[status, column] if status in by_status.index else 0
         
         # 1. Revenue (completed orders only)
-        rev = valid_orders['line_total'].sum()
+        rev = status_total('completed', 'line_total')
         
         # 2. Average Order Value (AOV)
+        valid_orders = self.df[self._completed()]
         if not valid_orders.empty:
-            aov = valid_orders.groupby('order_id')['line_total'].sum().mean()
+            aov = valid_orders.groupby('order_id', sort=False)['line_total'].sum().mean()
         else:
             aov = 0
 
         # 3. Return Rate (returned / total)
         total_qty = self.df['quantity'].sum()
-        ret_qty = self.df[self.df['status'] == 'returned']['quantity'].sum()
+        ret_qty = status_total('returned', 'qty')
         ret_rate = (ret_qty / total_qty * 100) if total_qty > 0 else 0
 
         # 4. Cancellation Rate (cancelled / total unique orders)
-        unique = self.df.drop_duplicates(subset=['order_id'])
-        cancel_rate = (len(unique[unique['status'] == 'cancelled']) / len(unique) * 100) if len(unique) > 0 else 0
+        unique_orders = self.df['order_id'].nunique()
+        cancel_rate = (status_total('cancelled', 'orders') / unique_orders * 100) if unique_orders > 0 else 0
         
         # 5. Top SKU by quantity
         if 'sku' in self.df.columns:
@@ -59,32 +93,72 @@ class KPIAnalyzer:
 
     def get_daily_revenue(self):
         """
-        Get daily revenue trend (completed orders only)
+        Get daily revenue trend (completed orders only, cached per analyzer)
         
         Returns:
             pd.Series: Daily revenue indexed by date
         """
+        return self._memo('daily_revenue', self._compute_daily_revenue)
+
+    def _compute_daily_revenue(self):
         if self.df.empty: 
             return pd.DataFrame()
-        valid = self.df[self.df['status'] == 'completed']
+        valid = self.df[self._completed()]
         return valid.groupby(valid['order_date'].dt.date)['line_total'].sum()
 
+    def get_daily_revenue_arrays(self):
+        """
+        Daily revenue as plain arrays for plotting (cached per analyzer)
+        
+        Returns:
+            tuple: (dates as datetime64[D] array, revenue as float64 array)
+        """
+        return self._memo('daily_revenue_arrays', self._compute_daily_revenue_arrays)
+
+    def _compute_daily_revenue_arrays(self):
+        daily = self.get_daily_revenue()
+        if daily.empty:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype='float64')
+        return np.asarray(daily.index, dtype='datetime64[D]'), daily.to_numpy(dtype='float64')
+
     def get_channel_dist(self):
         """
-        Get revenue distribution by sales channel (completed orders only)
+        Get revenue distribution by sales channel (completed orders only, cached per analyzer)
         
         Returns:
             pd.Series: Revenue by channel name
         """
+        return self._memo('channel_dist', self._compute_channel_dist)
+
+    def _compute_channel_dist(self):
         if self.df.empty: 
             return pd.DataFrame()
-        valid = self.df[self.df['status'] == 'completed']
-        return valid.groupby('channel_name')['line_total'].sum()
+        valid = self.df[self._completed()]
+        return valid.groupby('channel_name', observed=True)['line_total'].sum()
+
+    def get_channel_dist_arrays(self):
+        """
+        Channel revenue as plain values for plotting (cached per analyzer)
+        
+        Returns:
+            tuple: (channel names as list of str, revenue as float64 array)
+        """
+        return self._memo('channel_dist_arrays', self._compute_channel_dist_arrays)
+
+    def _compute_channel_dist_arrays(self):
+        dist = self.get_channel_dist()
+        if dist.empty:
+            return [], np.array([], dtype='float64')
+        return [str(name) for name in dist.index], dist.to_numpy(dtype='float64')
 
     def filter(self, channel, date_range):
         """
         Filter data by channel and date range
         
+        Repeated calls with the same arguments return the same analyzer, so
+        its cached metrics are reused. Only the FILTER_CACHE_ENTRIES most
+        recently used filters are kept.
+        
         Args:
             channel: Channel name or 'All'
             date_range: [start_date, end_date] or empty list
@@ -92,10 +166,26 @@ class KPIAnalyzer:
         Returns:
             KPIAnalyzer: New analyzer with filtered data
         """
-        temp = self.df.copy()
+        key = (channel, tuple(date_range))
+        filtered = self._filters.get(key)
+        if filtered is None:
+            filtered = self._filters[key] = self._filter(channel, date_range)
+            while len(self._filters) > self.FILTER_CACHE_ENTRIES:
+                self._filters.popitem(last=False)
+        self._filters.move_to_end(key)
+        return filtered
+
+    def _filter(self, channel, date_range):
+        # Combine all conditions into one boolean array, then select once
+        mask = None
         if channel != 'All':
-            temp = temp[temp['channel_name'] == channel]
+            mask = (self.df['channel_name'] == channel).to_numpy()
         if len(date_range) == 2:
             s, e = date_range
-            temp = temp[(temp['order_date'].dt.date >= s) & (temp['order_date'].dt.date <= e)]
-        return KPIAnalyzer(temp)
+            dates = self.df['order_date']
+            # Timestamp bounds keep the comparison on datetime64 (no per-row .dt.date objects)
+            in_range = ((dates >= pd.Timestamp(s)) & (dates < pd.Timestamp(e) + pd.Timedelta(days=1))).to_numpy()
+            mask = in_range if mask is None else mask & in_range
+        if mask is None or mask.all():
+            return KPIAnalyzer(self.df)  # nothing filtered out: share the frame, no copy
+        return KPIAnalyzer(self.df[mask])
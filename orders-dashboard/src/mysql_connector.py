@@ -1,8 +1,11 @@
 """
 MySQL Connector: Manage database connections and operations
 """
+import os
+import tempfile
+import threading
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 import streamlit as st
 from typing import Optional, List
 import pandas as pd
@@ -11,6 +14,14 @@ import pandas as pd
 class MySQLConnector:
     """Handle MySQL database connections and operations"""
     
+    # Tables get_table_count may interpolate into its query
+    KNOWN_TABLES = frozenset({'channels', 'orders', 'items', 'data_import_log'})
+    
+    # Process-wide pools behind connect(pooled=True), one per (host, user, database)
+    SHARED_POOL_SIZE = 8
+    _shared_pools = {}
+    _shared_pools_lock = threading.Lock()
+    
     def __init__(self, 
                  host: str = "localhost",
                  user: str = "root",
@@ -21,87 +32,323 @@ class MySQLConnector:
         self.password = password
         self.database = database
         self.connection = None
+        self.in_transaction = False
+    
+    def connect(self, pooled: bool = False) -> bool:
+        """
+        Establish MySQL connection
+
+        With pooled=True the connection is borrowed from a process-wide pool
+        (no TCP/auth handshake after the first use); disconnect() returns it.
+        """
+        try:
+            if pooled:
+                self.connection = self._shared_pool().get_connection()
+            else:
+                self.connection = mysql.connector.connect(
+                    host=self.host,
+                    user=self.user,
+                    password=self.password,
+                    database=self.database,
+                    allow_local_infile=True
+                )
+            return True
+        except Error as e:
+            print(f"Error connecting to MySQL: {e}")
+            return False
     
-    def connect(self) -> bool:
-        """Establish MySQL connection"""
+    def create_pool(self, pool_name: str = "orders_dashboard", pool_size: int = 5):
+        """Create a connection pool with this connector's settings; None on failure"""
         try:
-            self.connection = mysql.connector.connect(
+            return pooling.MySQLConnectionPool(
+                pool_name=pool_name,
+                pool_size=pool_size,
                 host=self.host,
                 user=self.user,
                 password=self.password,
-                database=self.database
+                database=self.database,
+                allow_local_infile=True
             )
-            return True
         except Error as e:
-            print(f"Error connecting to MySQL: {e}")
-            return False
+            print(f"Error creating MySQL connection pool: {e}")
+            return None
+    
+    def _shared_pool(self):
+        """The process-wide pool for this connector's settings, created on first use"""
+        key = (self.host, self.user, self.database)
+        with self._shared_pools_lock:
+            pool = self._shared_pools.get(key)
+            if pool is None:
+                # Raises Error when MySQL is unreachable; connect() reports it
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=f"shared_{len(self._shared_pools)}",
+                    pool_size=self.SHARED_POOL_SIZE,
+                    host=self.host,
+                    user=self.user,
+                    password=self.password,
+                    database=self.database,
+                    allow_local_infile=True
+                )
+                self._shared_pools[key] = pool
+            return pool
     
     def disconnect(self):
-        """Close MySQL connection"""
+        """Close MySQL connection (a pooled one goes back to its pool)"""
         if self.connection and self.connection.is_connected():
             self.connection.close()
     
+    def begin(self):
+        """
+        Start an explicit transaction
+
+        execute_* calls defer their commits until commit(); a failed statement
+        no longer rolls back the transaction, the caller decides via rollback().
+        """
+        self.connection.start_transaction()
+        self.in_transaction = True
+    
+    def commit(self):
+        """Commit the current transaction"""
+        self.connection.commit()
+        self.in_transaction = False
+    
+    def rollback(self):
+        """Roll back the current transaction"""
+        self.connection.rollback()
+        self.in_transaction = False
+    
+    def _autocommit(self):
+        """Commit a single statement unless an explicit transaction is open"""
+        if not self.in_transaction:
+            self.connection.commit()
+    
+    def _rollback_failed(self):
+        """Roll back after a failed statement unless an explicit transaction is open"""
+        if not self.in_transaction:
+            self.rollback()
+    
+    def set_bulk_load_mode(self, enabled: bool) -> bool:
+        """
+        Switch this session's settings for large imports on or off
+
+        Enabled: 256MB bulk_insert_buffer_size, foreign_key_checks off.
+        Disabled: back to the server defaults. unique_checks stays on: the
+        REPLACE / ON DUPLICATE KEY upserts rely on the unique keys being checked.
+        """
+        if enabled:
+            query = ("SET SESSION bulk_insert_buffer_size = 268435456, "
+                     "foreign_key_checks = 0")
+        else:
+            query = ("SET SESSION bulk_insert_buffer_size = DEFAULT, "
+                     "foreign_key_checks = 1")
+        return self.execute_query(query)
+    
     def execute_query(self, query: str, params: tuple = None) -> bool:
         """Execute a single query (CREATE, INSERT, UPDATE, DELETE)"""
         try:
             cursor = self.connection.cursor()
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            self.connection.commit()
-            cursor.close()
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+            finally:
+                cursor.close()
+            self._autocommit()
             return True
         except Error as e:
             print(f"Error executing query: {e}")
-            self.connection.rollback()
+            self._rollback_failed()
             return False
     
-    def execute_many(self, query: str, data: List[tuple]) -> bool:
-        """Execute multiple inserts/updates"""
+    def execute_many(self, query: str, data: List[tuple], chunk_size: int = 10000) -> bool:
+        """
+        Execute multiple inserts/updates
+
+        Rows are sent in executemany batches of chunk_size (each rewritten
+        into a multi-row INSERT, and kept under max_allowed_packet), with a
+        single commit at the end.
+        """
         try:
+            # One cursor for all chunks, closed even when a chunk fails
             cursor = self.connection.cursor()
-            cursor.executemany(query, data)
-            self.connection.commit()
-            cursor.close()
+            try:
+                for start in range(0, len(data), chunk_size):
+                    cursor.executemany(query, data[start:start + chunk_size])
+            finally:
+                cursor.close()
+            self._autocommit()
             return True
         except Error as e:
             print(f"Error executing batch query: {e}")
-            self.connection.rollback()
+            self._rollback_failed()
+            return False
+    
+    def execute_values_batch(self, query_prefix: str, data: List[tuple],
+                             query_suffix: str = "", page_size: int = 10000) -> bool:
+        """
+        Execute a multi-row INSERT: one `VALUES (..), (..), ...` statement per page
+
+        Args:
+            query_prefix: Statement up to (not including) VALUES, e.g. "INSERT INTO t (a, b)"
+            data: Row tuples to insert
+            query_suffix: Optional trailing clause, e.g. "ON DUPLICATE KEY UPDATE ..."
+            page_size: Rows per statement
+        """
+        if not data:
+            return True
+        try:
+            row_placeholder = "(" + ", ".join(["%s"] * len(data[0])) + ")"
+            cursor = self.connection.cursor()
+            try:
+                for start in range(0, len(data), page_size):
+                    page = data[start:start + page_size]
+                    values = ", ".join([row_placeholder] * len(page))
+                    params = [value for row in page for value in row]
+                    cursor.execute(f"{query_prefix} VALUES {values} {query_suffix}", params)
+            finally:
+                cursor.close()
+            self._autocommit()
+            return True
+        except Error as e:
+            print(f"Error executing batch insert: {e}")
+            self._rollback_failed()
+            return False
+    
+    def load_data_infile(self, file_path: str, table: str, columns: List[str],
+                         ignore_duplicates: bool = False, ignore_lines: int = 0,
+                         replace_duplicates: bool = False, line_terminator: str = '\n') -> bool:
+        """
+        Bulk load a CSV file with LOAD DATA LOCAL INFILE
+
+        ignore_lines skips leading lines (1 for a header row).
+        replace_duplicates makes later rows win on a duplicate key
+        (ignore_duplicates keeps the first one).
+        line_terminator must match the file (CRLF for files written on
+        Windows, otherwise the last field of every row keeps a trailing CR).
+        Requires `local_infile` to be enabled on the server.
+        """
+        # SQL string literal for the terminator (only LF / CRLF files are expected)
+        lines_sql = {'\n': '\\n', '\r\n': '\\r\\n'}[line_terminator]
+        if replace_duplicates:
+            duplicates = 'REPLACE'
+        else:
+            duplicates = 'IGNORE' if ignore_duplicates else ''
+        try:
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(f"""
+                LOAD DATA LOCAL INFILE %s {duplicates}
+                INTO TABLE {table}
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                LINES TERMINATED BY '{lines_sql}'
+                IGNORE {int(ignore_lines)} LINES
+                ({', '.join(columns)})
+                """, (file_path,))
+            finally:
+                cursor.close()
+            self._autocommit()
+            return True
+        except Error as e:
+            print(f"Error loading data file: {e}")
+            self._rollback_failed()
             return False
     
+    def load_dataframe(self, df: pd.DataFrame, table: str, columns: List[str],
+                       ignore_duplicates: bool = False, replace_duplicates: bool = False) -> bool:
+        """Bulk load DataFrame columns through a temp CSV and LOAD DATA LOCAL INFILE"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as tmp:
+            df.to_csv(tmp, columns=columns, header=False, index=False,
+                      na_rep='\\N', lineterminator='\n')
+            tmp_path = tmp.name
+        try:
+            return self.load_data_infile(tmp_path, table, columns, ignore_duplicates,
+                                         replace_duplicates=replace_duplicates)
+        finally:
+            os.remove(tmp_path)
+    
     def fetch_all(self, query: str) -> Optional[List]:
         """Fetch all results from a SELECT query"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
-            return results
+            try:
+                cursor.execute(query)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
         except Error as e:
             print(f"Error fetching data: {e}")
             return None
     
-    def fetch_df(self, query: str) -> Optional[pd.DataFrame]:
-        """Fetch results as pandas DataFrame"""
+    def fetch_df_chunks(self, query: str, params: tuple = None, chunk_size: int = 50_000):
+        """
+        Yield the results of a query as DataFrames of up to chunk_size rows
+
+        Rows are read from an unbuffered cursor with fetchmany, so only one
+        chunk of row tuples is held at a time. Always yields at least one
+        (possibly empty) frame; raises mysql.connector.Error on failure.
+        """
+        cursor = self.connection.cursor(buffered=False)
         try:
-            return pd.read_sql(query, self.connection)
+            cursor.execute(query, params)
+            columns = [col[0] for col in cursor.description]
+            yielded = False
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yielded = True
+                # coerce_float: DECIMAL columns arrive as decimal.Decimal, make them float64
+                # (as pd.read_sql does) instead of object columns
+                yield pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            if not yielded:
+                yield pd.DataFrame(columns=columns)
+        finally:
+            self.connection.consume_results()  # drop unread rows if the caller stopped early
+            cursor.close()
+    
+    def fetch_df(self, query: str, params: tuple = None, dtype: dict = None) -> Optional[pd.DataFrame]:
+        """
+        Fetch results as pandas DataFrame
+
+        Built chunk by chunk from fetch_df_chunks (no pd.read_sql DBAPI round
+        trip, no full list of row tuples); dtype optionally fixes column types.
+        """
+        try:
+            chunks = list(self.fetch_df_chunks(query, params))
+            df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+            return df.astype(dtype) if dtype else df
         except Error as e:
             print(f"Error fetching DataFrame: {e}")
             return None
     
+    def execute_query_scalar(self, query: str, params: tuple = None):
+        """Return the first column of the first row of a query (None if no row or on error)"""
+        try:
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(query, params)
+                row = cursor.fetchone()
+                cursor.fetchall()  # drain any remaining rows so the connection stays usable
+            finally:
+                cursor.close()
+            return row[0] if row else None
+        except Error as e:
+            print(f"Error fetching value: {e}")
+            return None
+    
     def table_exists(self, table_name: str) -> bool:
         """Check if a table exists"""
-        query = f"""
-        SELECT COUNT(*) FROM information_schema.tables 
-        WHERE table_schema = '{self.database}' 
-        AND table_name = '{table_name}'
+        query = """
+        SELECT 1 FROM information_schema.tables
+        WHERE table_schema = %s AND table_name = %s
+        LIMIT 1
         """
-        result = self.fetch_all(query)
-        return result[0][0] > 0 if result else False
+        return self.execute_query_scalar(query, (self.database, table_name)) is not None
     
     def get_table_count(self, table_name: str) -> int:
-        """Get row count from a table"""
-        query = f"SELECT COUNT(*) FROM {table_name}"
-        result = self.fetch_all(query)
-        return result[0][0] if result else 0
+        """Get row count from a table (table names can't be bound, so only known tables)"""
+        if table_name not in self.KNOWN_TABLES:
+            print(f"Unknown table: {table_name}")
+            return 0
+        return self.execute_query_scalar(f"SELECT COUNT(*) FROM {table_name}") or 0
@@ -3,14 +3,34 @@ MySQL DataLoader: Load CSV data into MySQL database
 """
 import pandas as pd
 import os
+from typing import Optional, Union
 from datetime import datetime
 import streamlit as st
 from mysql_connector import MySQLConnector
+from database_schema import DatabaseSchema, CSV_DTYPES
+
+# Columns each loader writes, with the type to cast to (None: keep as read)
+LOAD_SCHEMAS = {
+    'channels': {'channel_id': 'int64', 'channel_name': None},
+    'orders': {'order_id': 'int64', 'channel_id': 'int64', 'order_date': None,
+               'status': None, 'updated_at': None},
+    'items': {'order_id': 'int64', 'sku': None, 'quantity': 'int64', 'unit_price': 'float64'},
+}
+
+# Known column types of data_import_log for get_import_history
+IMPORT_LOG_DTYPES = {
+    'import_id': 'Int64',
+    'rows_imported': 'Int64',
+    'rows_failed': 'Int64',
+    'import_date': 'datetime64[ns]',
+}
 
 
 class MySQLDataLoader:
     """Handle CSV file loading and MySQL database operations"""
     
+    CSV_CHUNK_ROWS = 50_000
+    
     def __init__(self, 
                  host: str = "localhost",
                  user: str = "root",
@@ -18,13 +38,16 @@ class MySQLDataLoader:
                  database: str = "orders_dashboard"):
         self.connector = MySQLConnector(host, user, password, database)
         self.import_log = []
+        self._pending_logs = []  # import log rows not yet written, see _log_import
     
     def connect(self) -> bool:
         """Connect to MySQL"""
         return self.connector.connect()
     
     def disconnect(self):
-        """Disconnect from MySQL"""
+        """Write pending import logs, then disconnect from MySQL"""
+        if not self.flush_logs():
+            print(f"Warning: {len(self._pending_logs)} import log rows could not be written")
         self.connector.disconnect()
     
     def load_csv_to_dataframe(self, file_path: str) -> pd.DataFrame:
@@ -36,151 +59,290 @@ class MySQLDataLoader:
             print(f"Error loading CSV: {e}")
             return pd.DataFrame()
     
-    def load_channels(self, df: pd.DataFrame, file_name: str = "channels.csv") -> tuple:
-        """Load channels data into MySQL"""
+    @staticmethod
+    def _coerce(df: pd.DataFrame, file_type: str) -> pd.DataFrame:
+        """Select the loader's columns (missing ones become NULL) and cast them in one astype"""
+        schema = LOAD_SCHEMAS[file_type]
+        df = df.reindex(columns=list(schema))
+        return df.astype({col: dtype for col, dtype in schema.items() if dtype})
+    
+    def _iter_chunks(self, source, file_type: str):
+        """
+        Yield DataFrames to insert from a DataFrame or a CSV path / file-like
+        
+        CSV sources are streamed CSV_CHUNK_ROWS rows at a time with the
+        table's known dtypes, so peak memory stays at one chunk.
+        """
+        if isinstance(source, pd.DataFrame):
+            yield source
+        else:
+            yield from pd.read_csv(source, chunksize=self.CSV_CHUNK_ROWS,
+                                   dtype=CSV_DTYPES.get(file_type))
+    
+    def load_channels(self, source: Union[pd.DataFrame, str], file_name: str = "channels.csv",
+                      chunk_size: int = 10000) -> tuple:
+        """Load channels data (DataFrame or CSV path / file-like) into MySQL"""
         try:
             # Clear existing channels
             self.connector.execute_query("DELETE FROM channels")
             
-            # Prepare data
-            data = [(int(row['channel_id']), row['channel_name']) 
-                   for _, row in df.iterrows()]
+            rows = 0
+            for df in self._iter_chunks(source, 'channels'):
+                if not self._insert_channels_chunk(df, chunk_size):
+                    return False, "Failed to insert channels"
+                rows += len(df)
             
-            # Insert
-            query = "INSERT INTO channels (channel_id, channel_name) VALUES (%s, %s)"
-            success = self.connector.execute_many(query, data)
-            
-            if success:
-                log_entry = {
-                    "file_name": file_name,
-                    "file_type": "channels",
-                    "rows_imported": len(df),
-                    "status": "success"
-                }
-                self._log_import(log_entry)
-                return True, f"Loaded {len(df)} channels"
-            else:
-                return False, "Failed to insert channels"
+            log_entry = {
+                "file_name": file_name,
+                "file_type": "channels",
+                "rows_imported": rows,
+                "status": "success"
+            }
+            self._log_import(log_entry)
+            return True, f"Loaded {rows} channels"
         except Exception as e:
             return False, f"Error loading channels: {e}"
     
-    def load_orders(self, df: pd.DataFrame, file_name: str = "orders.csv") -> tuple:
-        """Load orders data into MySQL"""
+    def _insert_channels_chunk(self, df: pd.DataFrame, chunk_size: int) -> bool:
+        df = self._coerce(df, 'channels')
+        
+        # Bulk load; fall back to executemany batches
+        success = self.connector.load_dataframe(df, 'channels', list(df.columns))
+        if not success:
+            data = list(zip(df['channel_id'].tolist(), df['channel_name'].tolist()))
+            query = "INSERT INTO channels (channel_id, channel_name) VALUES (%s, %s)"
+            success = self.connector.execute_many(query, data, chunk_size)
+        return success
+    
+    def load_orders(self, source: Union[pd.DataFrame, str], file_name: str = "orders.csv",
+                    chunk_size: int = 10000) -> tuple:
+        """Load orders data (DataFrame or CSV path / file-like) into MySQL"""
         try:
-            # Remove duplicates based on order_id
-            df = df.drop_duplicates(subset=['order_id'], keep='last')
-            
-            # Prepare data
-            data = []
-            for _, row in df.iterrows():
-                data.append((
-                    int(row['order_id']),
-                    int(row['channel_id']),
-                    row['order_date'],
-                    row['status'],
-                    row['updated_at'] if 'updated_at' in row else None
-                ))
+            rows = 0
+            for df in self._iter_chunks(source, 'orders'):
+                if not self._upsert_orders_chunk(df, chunk_size):
+                    return False, "Failed to insert orders"
+                rows += len(df)
             
-            # Insert or update
-            query = """
-            INSERT INTO orders (order_id, channel_id, order_date, status, updated_at)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                channel_id = VALUES(channel_id),
-                order_date = VALUES(order_date),
-                status = VALUES(status),
-                updated_at = VALUES(updated_at)
-            """
-            success = self.connector.execute_many(query, data)
-            
-            if success:
-                log_entry = {
-                    "file_name": file_name,
-                    "file_type": "orders",
-                    "rows_imported": len(df),
-                    "status": "success"
-                }
-                self._log_import(log_entry)
-                return True, f"Loaded {len(df)} orders"
-            else:
-                return False, "Failed to insert orders"
+            log_entry = {
+                "file_name": file_name,
+                "file_type": "orders",
+                "rows_imported": rows,
+                "status": "success"
+            }
+            self._log_import(log_entry)
+            return True, f"Loaded {rows} orders"
         except Exception as e:
             return False, f"Error loading orders: {e}"
     
-    def load_items(self, df: pd.DataFrame, file_name: str = "items.csv") -> tuple:
-        """Load items data into MySQL"""
+    def _upsert_orders_chunk(self, df: pd.DataFrame, chunk_size: int) -> bool:
+        # Duplicate order_ids are resolved server-side (last row wins), which
+        # also covers duplicates across chunks and files
+        
+        # Prepare data (a missing updated_at column becomes NULL)
+        df = self._coerce(df, 'orders')
+        
+        # Bulk load into a staging table and upsert from there;
+        # fall back to executemany batches
+        success = self._upsert_orders_via_stage(df)
+        if not success:
+            success = self._upsert_orders_batched(df, chunk_size)
+        if success:
+            success = DatabaseSchema.refresh_order_totals(self.connector, df['order_id'].tolist())
+        return success
+    
+    def _upsert_orders_via_stage(self, df: pd.DataFrame) -> bool:
+        """LOAD DATA the orders into a temporary copy of the table, then INSERT ... SELECT upsert"""
+        cols = list(LOAD_SCHEMAS['orders'])
+        if not self.connector.execute_query("CREATE TEMPORARY TABLE orders_stage LIKE orders"):
+            return False
         try:
-            # Remove duplicates and invalid rows
-            df = df.dropna(subset=['order_id', 'quantity', 'unit_price'])
-            
-            # Prepare data
-            data = []
-            for _, row in df.iterrows():
-                data.append((
-                    int(row['order_id']),
-                    row['sku'],
-                    int(row['quantity']),
-                    float(row['unit_price'])
-                ))
+            if not self.connector.load_dataframe(df, 'orders_stage', cols, replace_duplicates=True):
+                return False
+            return self.connector.execute_query("""
+            INSERT INTO orders (order_id, channel_id, order_date, status, updated_at)
+            SELECT s.order_id, s.channel_id, s.order_date, s.status, s.updated_at
+            FROM orders_stage s
+            ON DUPLICATE KEY UPDATE
+                channel_id = s.channel_id,
+                order_date = s.order_date,
+                status = s.status,
+                updated_at = s.updated_at
+            """)
+        finally:
+            self.connector.execute_query("DROP TEMPORARY TABLE IF EXISTS orders_stage")
+    
+    def _upsert_orders_batched(self, df: pd.DataFrame, chunk_size: int) -> bool:
+        """INSERT ... ON DUPLICATE KEY UPDATE the orders in executemany batches"""
+        # NaN/NaT are not valid query parameters: send missing updated_at as NULL
+        updated_at = df['updated_at'].astype(object).where(df['updated_at'].notna(), None)
+        data = list(zip(
+            df['order_id'].tolist(),
+            df['channel_id'].tolist(),
+            df['order_date'].tolist(),
+            df['status'].tolist(),
+            updated_at.tolist()
+        ))
+        query = """
+        INSERT INTO orders (order_id, channel_id, order_date, status, updated_at)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            channel_id = VALUES(channel_id),
+            order_date = VALUES(order_date),
+            status = VALUES(status),
+            updated_at = VALUES(updated_at)
+        """
+        return self.connector.execute_many(query, data, chunk_size)
+    
+    def load_items(self, source: Union[pd.DataFrame, str], file_name: str = "items.csv",
+                   chunk_size: int = 10000) -> tuple:
+        """Load items data (DataFrame or CSV path / file-like) into MySQL"""
+        try:
+            rows = 0
+            for df in self._iter_chunks(source, 'items'):
+                inserted = self._insert_items_chunk(df, chunk_size)
+                if inserted is None:
+                    return False, "Failed to insert items"
+                rows += inserted
             
-            # Insert
+            log_entry = {
+                "file_name": file_name,
+                "file_type": "items",
+                "rows_imported": rows,
+                "status": "success"
+            }
+            self._log_import(log_entry)
+            return True, f"Loaded {rows} items"
+        except Exception as e:
+            return False, f"Error loading items: {e}"
+    
+    def _insert_items_chunk(self, df: pd.DataFrame, chunk_size: int) -> Optional[int]:
+        """Insert one chunk of items, returning the rows inserted (None on failure)"""
+        # Remove invalid rows (plain notna mask, cheaper than dropna)
+        valid = df[['order_id', 'quantity', 'unit_price']].notna().all(axis=1).to_numpy()
+        if not valid.all():
+            df = df.iloc[valid]
+        
+        df = self._coerce(df, 'items')
+        
+        # Bulk load; fall back to executemany batches
+        cols = list(df.columns)
+        success = self.connector.load_dataframe(df, 'items', cols)
+        if not success:
+            data = list(zip(*(df[col].tolist() for col in cols)))
             query = """
             INSERT INTO items (order_id, sku, quantity, unit_price)
             VALUES (%s, %s, %s, %s)
             """
-            success = self.connector.execute_many(query, data)
-            
-            if success:
-                log_entry = {
-                    "file_name": file_name,
-                    "file_type": "items",
-                    "rows_imported": len(df),
-                    "status": "success"
-                }
-                self._log_import(log_entry)
-                return True, f"Loaded {len(df)} items"
-            else:
-                return False, "Failed to insert items"
+            success = self.connector.execute_many(query, data, chunk_size)
+        if success:
+            success = DatabaseSchema.refresh_order_totals(self.connector, df['order_id'].tolist())
+        return len(df) if success else None
+    
+    def load_all(self, channels_source, orders_source, items_source,
+                 chunk_size: int = 10000) -> tuple:
+        """
+        Load channels, orders and items (DataFrames or CSV sources) in one transaction
+        
+        orders_source may be a list of sources, loaded in order (a later row
+        wins for a repeated order_id); a None source is skipped. Runs in the
+        connector's bulk load mode with a single commit at the end; any
+        failure rolls back the whole import.
+        """
+        if not isinstance(orders_source, (list, tuple)):
+            orders_source = [orders_source]
+        loaders = [(self.load_channels, channels_source)]
+        loaders.extend((self.load_orders, source) for source in orders_source)
+        loaders.append((self.load_items, items_source))
+        logs_before = len(self._pending_logs)
+        self.connector.set_bulk_load_mode(True)
+        self.connector.begin()
+        try:
+            messages = []
+            for load, source in loaders:
+                if source is None:
+                    continue
+                name = self._source_name(source)
+                kwargs = {'file_name': name} if name else {}
+                success, message = load(source, chunk_size=chunk_size, **kwargs)
+                if not success:
+                    self.connector.rollback()
+                    del self._pending_logs[logs_before:]  # those imports were rolled back
+                    return False, message
+                messages.append(message)
+            if not self.flush_logs():  # log rows go out in the same transaction
+                self.connector.rollback()
+                del self._pending_logs[logs_before:]
+                return False, "Failed to write the import log"
+            self.connector.commit()
+            return True, "; ".join(messages)
         except Exception as e:
-            return False, f"Error loading items: {e}"
+            self.connector.rollback()
+            del self._pending_logs[logs_before:]
+            return False, f"Error loading data: {e}"
+        finally:
+            self.connector.set_bulk_load_mode(False)
+    
+    @staticmethod
+    def _source_name(source) -> Optional[str]:
+        """File name to log for a CSV path or uploaded file (None for a DataFrame)"""
+        if isinstance(source, str):
+            return os.path.basename(source)
+        return getattr(source, 'name', None)
     
     def load_uploaded_file(self, uploaded_file, file_type: str) -> tuple:
-        """Load an uploaded file based on file type"""
+        """Load an uploaded file based on file type (streamed in chunks)"""
         try:
-            df = pd.read_csv(uploaded_file)
-            
             if file_type.lower() == "channels":
-                return self.load_channels(df, uploaded_file.name)
+                return self.load_channels(uploaded_file, uploaded_file.name)
             elif file_type.lower() == "orders":
-                return self.load_orders(df, uploaded_file.name)
+                return self.load_orders(uploaded_file, uploaded_file.name)
             elif file_type.lower() == "items":
-                return self.load_items(df, uploaded_file.name)
+                return self.load_items(uploaded_file, uploaded_file.name)
             else:
                 return False, f"Unknown file type: {file_type}"
         except Exception as e:
             return False, f"Error processing file: {e}"
     
     def _log_import(self, log_entry: dict):
-        """Log import operation to database"""
+        """
+        Record an import log row
+        
+        Written right away, except inside an open transaction (load_all),
+        where rows are queued and flushed with the import's commit.
+        """
+        self._pending_logs.append((
+            log_entry.get("file_name"),
+            log_entry.get("file_type"),
+            log_entry.get("rows_imported"),
+            log_entry.get("status")
+        ))
+        if not self.connector.in_transaction:
+            self.flush_logs()
+    
+    def flush_logs(self) -> bool:
+        """Write all queued import log rows in one executemany"""
+        if not self._pending_logs:
+            return True
         try:
             query = """
             INSERT INTO data_import_log (file_name, file_type, rows_imported, import_status)
             VALUES (%s, %s, %s, %s)
             """
-            data = (
-                log_entry.get("file_name"),
-                log_entry.get("file_type"),
-                log_entry.get("rows_imported"),
-                log_entry.get("status")
-            )
-            self.connector.execute_query(query, data)
+            if not self.connector.execute_many(query, self._pending_logs):
+                print("Error logging import: import log rows kept for the next flush")
+                return False
+            self._pending_logs = []
+            return True
         except Exception as e:
             print(f"Error logging import: {e}")
+            return False
     
     def get_import_history(self) -> pd.DataFrame:
         """Get import history from database"""
+        self.flush_logs()
         query = "SELECT * FROM data_import_log ORDER BY import_date DESC LIMIT 50"
-        return self.connector.fetch_df(query)
+        return self.connector.fetch_df(query, dtype=IMPORT_LOG_DTYPES)
     
     def get_table_stats(self) -> dict:
         """Get row counts for all tables"""
@@ -1,22 +1,65 @@
 """
 ReportGenerator: Generate PDF reports with charts and metrics
 """
+import io
 import os
+import tempfile
 from datetime import datetime
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib
-from fpdf import FPDF
-from .config import FILE_CONFIG, BASE_DIR
+from matplotlib.figure import Figure
+from fpdf import FPDF, FPDF_VERSION
+from .config import FILE_CONFIG
 
 matplotlib.use('Agg')
 
+# Chart raster resolution: the PNG is shown 190mm wide, so 72 DPI (about
+# 700px) is enough, and savefig / PNG encode time scales with the pixel count
+CHART_DPI = 72
+
+# fpdf2 places images from in-memory buffers; legacy fpdf 1.7 only reads file paths
+FPDF_IMAGE_BUFFERS = int(FPDF_VERSION.split('.')[0]) >= 2
+
 
 class ReportGenerator:
     """
     Reporting Layer: Export data to PDF with visualizations and metrics
     """
     
+    # Whether the Vietnamese font loaded (None until the first export tries it).
+    # fpdf needs add_font per document, but keeps the parsed metrics in a .pkl
+    # next to the TTF, so only the first export in a process parses the font.
+    _font_ok = None
+    
+    def __init__(self):
+        self._fig = None
+        self._ax = None
+    
+    def _chart_axes(self):
+        """Shared 10x4 figure, created on first use and cleared for each chart"""
+        if self._fig is None:
+            self._fig = Figure(figsize=(10, 4))
+            self._ax = self._fig.add_subplot()
+        else:
+            self._ax.clear()
+        return self._ax
+    
+    def _place_chart(self, pdf):
+        """Render the shared figure to PNG and put it on the page"""
+        if FPDF_IMAGE_BUFFERS:
+            buf = io.BytesIO()
+            self._fig.savefig(buf, format='png', bbox_inches='tight', dpi=CHART_DPI)
+            buf.seek(0)
+            pdf.image(buf, x=10, w=190)
+            return
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
+            self._fig.savefig(tmp, format='png', bbox_inches='tight', dpi=CHART_DPI)
+        try:
+            pdf.image(tmp.name, x=10, w=190)
+        finally:
+            os.remove(tmp.name)
+    
     def export_pdf(self, analyzer):
         """
         Generate PDF report with metrics and charts
@@ -32,13 +75,16 @@ class ReportGenerator:
         
         # --- Load Font Tiếng Việt ---
         font_path = FILE_CONFIG["font"]
+        if ReportGenerator._font_ok is None:
+            ReportGenerator._font_ok = os.path.exists(font_path)
         has_font = False
-        if os.path.exists(font_path):
+        if ReportGenerator._font_ok:
             try:
                 pdf.add_font('Vietnamese', '', font_path, uni=True)
                 pdf.set_font("Vietnamese", size=12)
                 has_font = True
             except:
+                ReportGenerator._font_ok = False
                 pdf.set_font("Arial", size=12)
         else:
             pdf.set_font("Arial", size=12)
@@ -51,41 +97,43 @@ class ReportGenerator:
         # --- Metrics ---
         rev, rate, aov, cancel, best = analyzer.get_metrics()
         
+        # Pick the text encoding once instead of branching on every line
+        if has_font:
+            def pdf_text(text):
+                return text
+        else:
+            def pdf_text(text):
+                return text.encode('latin-1', 'replace').decode('latin-1')
+        
         def write_line(text):
             """Write a line with proper encoding"""
-            if has_font:
-                pdf.cell(0, 10, txt=text, ln=1)
-            else:
-                pdf.cell(0, 10, txt=text.encode('latin-1', 'replace').decode('latin-1'), ln=1)
+            pdf.cell(0, 10, txt=pdf_text(text), ln=1)
 
-        write_line("1. Hiệu suất Kinh doanh:")
-        write_line(f"- Tổng Doanh thu: ${rev:,.2f}")
-        write_line(f"- Giá trị TB Đơn (AOV): ${aov:,.2f}")
-        write_line(f"- Tỷ lệ Hoàn trả: {rate:.2f}%")
-        write_line(f"- Tỷ lệ Hủy đơn: {cancel:.2f}%")
-        write_line(f"- Sản phẩm Top 1: {best}")
+        # Whole metrics block as one multi_cell (one line per metric)
+        pdf.multi_cell(0, 10, txt=pdf_text(
+            "1. Hiệu suất Kinh doanh:\n"
+            f"- Tổng Doanh thu: ${rev:,.2f}\n"
+            f"- Giá trị TB Đơn (AOV): ${aov:,.2f}\n"
+            f"- Tỷ lệ Hoàn trả: {rate:.2f}%\n"
+            f"- Tỷ lệ Hủy đơn: {cancel:.2f}%\n"
+            f"- Sản phẩm Top 1: {best}"
+        ))
         pdf.ln(5)
 
         write_line("2. Biểu đồ Xu hướng Doanh thu:")
         
         # --- Daily Revenue Chart ---
         try:
-            chart_data = analyzer.get_daily_revenue()
-            if not chart_data.empty:
-                plt.figure(figsize=(10, 4))
-                plt.plot(chart_data.index, chart_data.values, color='#0066cc', marker='o', linewidth=2)
-                plt.title("Revenue Trend")
-                plt.xlabel("Date")
-                plt.ylabel("Revenue ($)")
-                plt.grid(True, linestyle='--', alpha=0.5)
-                
-                temp_img = os.path.join(BASE_DIR, "temp_chart.png")
-                plt.savefig(temp_img, bbox_inches='tight', dpi=100)
-                plt.close()
+            dates, revenue = analyzer.get_daily_revenue_arrays()
+            if len(dates):
+                ax = self._chart_axes()
+                ax.plot(dates, revenue, color='#0066cc', marker='o', linewidth=2)
+                ax.set_title("Revenue Trend")
+                ax.set_xlabel("Date")
+                ax.set_ylabel("Revenue ($)")
+                ax.grid(True, linestyle='--', alpha=0.5)
                 
-                pdf.image(temp_img, x=10, w=190)
-                if os.path.exists(temp_img): 
-                    os.remove(temp_img)
+                self._place_chart(pdf)
             else:
                 write_line("(Không có dữ liệu biểu đồ)")
         except Exception as e:
@@ -96,33 +144,29 @@ class ReportGenerator:
 
         # --- Channel Distribution Chart ---
         try:
-            dist_data = analyzer.get_channel_dist()
-            if not dist_data.empty:
-                dist_data = dist_data.sort_values(ascending=True)
-                plt.figure(figsize=(10, 4))
-                bars = plt.barh(dist_data.index, dist_data.values, color='#28a745')
+            channels, channel_revenue = analyzer.get_channel_dist_arrays()
+            if len(channels):
+                order = np.argsort(channel_revenue, kind='stable')  # ascending, largest bar on top
+                ax = self._chart_axes()
+                bars = ax.barh([channels[i] for i in order], channel_revenue[order], color='#28a745')
                 
-                plt.title("Revenue by Channel")
-                plt.xlabel("Revenue ($)")
-                plt.grid(axis='x', linestyle='--', alpha=0.5)
+                ax.set_title("Revenue by Channel")
+                ax.set_xlabel("Revenue ($)")
+                ax.grid(axis='x', linestyle='--', alpha=0.5)
 
                 # Add value labels
                 for bar in bars:
                     width = bar.get_width()
-                    plt.text(width, bar.get_y() + bar.get_height()/2, 
+                    ax.text(width, bar.get_y() + bar.get_height()/2, 
                              f' ${width:,.0f}', 
                              va='center', ha='left', fontsize=10, color='black')
 
-                temp_img_2 = os.path.join(BASE_DIR, "temp_chart_chn.png")
-                plt.savefig(temp_img_2, bbox_inches='tight', dpi=100)
-                plt.close() 
-
-                pdf.image(temp_img_2, x=10, w=190)
-                if os.path.exists(temp_img_2): 
-                    os.remove(temp_img_2)
+                self._place_chart(pdf)
             else:
                 write_line("(Không có dữ liệu kênh)")
         except Exception as e:
             write_line(f"(Lỗi vẽ biểu đồ kênh: {str(e)[:50]})")
             
-        return pdf.output(dest='S').encode('latin-1')
+        output = pdf.output(dest='S')
+        # fpdf 1.7 returns a latin-1 str, fpdf2 a bytearray
+        return output.encode('latin-1') if isinstance(output, str) else bytes(output)
@@ -2,6 +2,7 @@
 Pytest fixtures for testing Orders Dashboard (Minimal Essential Tests)
 """
 import pytest
+import numpy as np
 import pandas as pd
 import os
 import tempfile
@@ -11,6 +12,14 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src import DataLoader, DataWarehouse, KPIAnalyzer
+from src.dashboard_exporter import DashboardExporter
+
+
+def _shared(df):
+    """Yield a frame shared across tests, failing loudly at teardown if any test modified it in place"""
+    snapshot = df.copy()
+    yield df
+    pd.testing.assert_frame_equal(df, snapshot)
 
 
 @pytest.fixture
@@ -20,48 +29,48 @@ def temp_dir():
         yield tmpdir
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_web_orders():
-    """Sample web orders data"""
-    return pd.DataFrame({
+    """Sample web orders data (shared by the session, tests only read it)"""
+    yield from _shared(pd.DataFrame({
         'order_id': [1, 2, 3, 4],
         'order_date': pd.date_range('2025-01-01', periods=4),
         'updated_at': pd.date_range('2025-01-01', periods=4),
         'status': ['completed', 'completed', 'returned', 'cancelled'],
         'channel_id': [1, 1, 2, 1]
-    })
+    }))
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_app_orders():
-    """Sample app orders data"""
-    return pd.DataFrame({
+    """Sample app orders data (shared by the session, tests only read it)"""
+    yield from _shared(pd.DataFrame({
         'order_id': [5, 6, 7],
         'order_date': pd.date_range('2025-01-05', periods=3),
         'updated_at': pd.date_range('2025-01-05', periods=3),
         'status': ['completed', 'completed', 'returned'],
         'channel_id': [2, 1, 2]
-    })
+    }))
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_items():
-    """Sample order items data"""
-    return pd.DataFrame({
+    """Sample order items data (shared by the session, tests only read it)"""
+    yield from _shared(pd.DataFrame({
         'order_id': [1, 2, 2, 3, 4, 5, 6, 7],
         'sku': ['SKU001', 'SKU002', 'SKU001', 'SKU003', 'SKU001', 'SKU002', 'SKU001', 'SKU003'],
         'quantity': [2, 1, 3, 1, 2, 2, 4, 1],
         'unit_price': [100.0, 50.0, 100.0, 75.0, 100.0, 50.0, 100.0, 75.0]
-    })
+    }))
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_channels():
-    """Sample channels data"""
-    return pd.DataFrame({
+    """Sample channels data (shared by the session, tests only read it)"""
+    yield from _shared(pd.DataFrame({
         'channel_id': [1, 2],
         'channel_name': ['Website', 'Mobile App']
-    })
+    }))
 
 
 @pytest.fixture
@@ -86,7 +95,7 @@ def sample_csv_files(temp_dir, sample_web_orders, sample_app_orders, sample_item
     }
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def merged_data(sample_web_orders, sample_app_orders, sample_items, sample_channels):
     """Expected merged and processed data"""
     # Combine web and app orders
@@ -103,4 +112,36 @@ def merged_data(sample_web_orders, sample_app_orders, sample_items, sample_chann
     # Calculate line_total
     merged['line_total'] = merged['quantity'] * merged['unit_price']
     
-    return merged
+    yield from _shared(merged)
+
+
+@pytest.fixture(scope="session")
+def dw_built(sample_web_orders, sample_app_orders, sample_items, sample_channels):
+    """DataWarehouse loaded with the sample web + app orders (built once per session, tests only read it)"""
+    dw = DataWarehouse()
+    dw.transform_and_load(sample_web_orders, sample_app_orders, sample_items, sample_channels)
+    return dw
+
+
+@pytest.fixture(scope="session")
+def sample_orders_df():
+    """Create sample orders data for testing (built once per session, tests only read it)"""
+    df = pd.DataFrame({
+        'order_id': [1, 2, 3, 4, 5, 6, 7, 8],
+        'channel_name': ['Web', 'App', 'Web', 'App', 'Web', 'App', 'Web', 'App'],
+        # Consecutive days from plain numpy arithmetic (no DatetimeIndex construction)
+        'order_date': np.datetime64('2025-01-01', 'ns') + np.arange(8).astype('timedelta64[D]'),
+        'status': ['completed', 'completed', 'pending', 'completed', 'cancelled', 'completed', 'returned', 'completed'],
+        'order_total': [100.00, 150.00, 200.00, 120.00, 80.00, 250.00, 90.00, 175.00]
+    })
+    df['status'] = df['status'].astype('category')  # status_mask in the exporter tests compares the codes
+    yield from _shared(df)
+
+
+@pytest.fixture(scope="session")
+def exporter():
+    """Create DashboardExporter instance"""
+    try:
+        return DashboardExporter()
+    except ImportError:
+        pytest.skip("reportlab not installed")
@@ -0,0 +1,57 @@
+"""
+Tests for the Streamlit dashboard's data version (cache key of the MySQL queries)
+The dashboard script is imported in Streamlit's bare mode, with MySQL unreachable
+"""
+import pytest
+import pandas as pd
+
+import sys
+import os
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+sys.path.insert(0, SRC_DIR)  # the dashboard script uses flat imports
+
+
+@pytest.fixture(scope="module")
+def dashboard():
+    """The dashboard module, imported without a database connection"""
+    pytest.importorskip("streamlit")
+    from mysql_connector import MySQLConnector
+    create_pool = MySQLConnector.create_pool
+    MySQLConnector.create_pool = lambda self, **kwargs: None
+    try:
+        import dashboard_mysql
+    finally:
+        MySQLConnector.create_pool = create_pool
+    return dashboard_mysql
+
+
+def _probe(*args, **kwargs):
+    """Version probe row (count, updated_at, revenue) that a status-only upsert leaves as is"""
+    return pd.DataFrame([{
+        'orders': 8,
+        'orders_updated': '2025-01-08 10:00:00',
+        'revenue': 1165.0,
+        'channels_updated': '2025-01-01 00:00:00',
+    }])
+
+
+class TestDataVersion:
+    """Test that writes from the dashboard change the data version"""
+
+    def test_status_only_upsert_changes_version(self, dashboard, monkeypatch):
+        """Test an upload that only changes statuses gives a new version"""
+        # Same count, updated_at and revenue before and after the upsert
+        monkeypatch.setattr(dashboard, 'query_df', _probe)
+        dashboard.get_data_version.clear()
+        before = dashboard.get_data_version(0)
+        after = dashboard.get_data_version(1)  # refresh_counter after the upload
+
+        assert before is not None and after is not None
+        assert before != after
+
+    def test_version_none_when_unreachable(self, dashboard, monkeypatch):
+        """Test the version is None when MySQL can't be queried"""
+        monkeypatch.setattr(dashboard, 'query_df', lambda *args, **kwargs: None)
+        dashboard.get_data_version.clear()
+
+        assert dashboard.get_data_version(0) is None
@@ -40,3 +40,67 @@ class TestDataLoaderCore:
         assert not result.empty
         assert 'col1' in result.columns
         assert len(result) == 2
+    
+    def test_load_refreshes_stale_parquet_cache(self, temp_dir):
+        """Test parquet side cache is written and ignored once the CSV changes"""
+        pytest.importorskip('pyarrow')
+        test_file = os.path.join(temp_dir, 'cached.csv')
+        pd.DataFrame({'col1': [1, 2]}).to_csv(test_file, index=False)
+        
+        DataLoader.load(None, test_file, 'Test')
+        assert os.path.exists(os.path.join(temp_dir, 'cached.parquet'))
+        
+        pd.DataFrame({'col1': [1, 2, 3]}).to_csv(test_file, index=False)
+        result = DataLoader.load(None, test_file, 'Test')
+        assert len(result) == 3
+    
+    def test_parquet_cache_keyed_on_read_options(self, temp_dir):
+        """Test a parquet copy written by an untyped read is not served to a typed one"""
+        pytest.importorskip('pyarrow')
+        from src.data_loader import _read_local_csv
+        test_file = os.path.join(temp_dir, 'keyed.csv')
+        pd.DataFrame({'status': ['completed', 'returned']}).to_csv(test_file, index=False)
+        
+        DataLoader.load(None, test_file, 'Test')
+        _read_local_csv.clear()  # as after a restart: only the parquet copy is left
+        result = DataLoader.load(None, test_file, 'Test', dtype={'status': 'category'})
+        assert result['status'].dtype == 'category'
+    
+    def test_load_typed_semicolon_orders(self, temp_dir):
+        """Test semicolon CSV is split into columns and read with the order dtypes"""
+        from src.data_loader import ORDER_DTYPES, ORDER_PARSE_DATES
+        test_file = os.path.join(temp_dir, 'orders_semicolon.csv')
+        with open(test_file, 'w') as f:
+            f.write("order_id;channel_id;order_date;status;updated_at\n"
+                    "1;1;2025-09-01;completed;2025-09-01 10:00:00\n"
+                    "2;2;2025-09-02;returned;2025-09-02 11:00:00\n")
+        
+        result = DataLoader.load(None, test_file, 'Test', dtype=ORDER_DTYPES, parse_dates=ORDER_PARSE_DATES)
+        assert list(result.columns) == ['order_id', 'channel_id', 'order_date', 'status', 'updated_at']
+        assert result['status'].dtype == 'category'
+        assert pd.api.types.is_datetime64_any_dtype(result['order_date'])
+    
+    def test_order_sources_load_typed_by_default(self, temp_dir, monkeypatch):
+        """Test the configured order exports get the order dtypes without passing them"""
+        from src import data_loader
+        test_file = os.path.join(temp_dir, 'orders_web.csv')
+        with open(test_file, 'w') as f:
+            f.write("order_id,channel_id,order_date,status,updated_at\n"
+                    "1,1,2025-09-01,completed,2025-09-01 10:00:00\n")
+        monkeypatch.setattr(data_loader, 'ORDER_SOURCES', {test_file})
+        
+        result = DataLoader.load(None, test_file, 'Test')
+        assert result['status'].dtype == 'category'
+        assert pd.api.types.is_datetime64_any_dtype(result['updated_at'])
+    
+    def test_upload_writes_raw_bytes(self, temp_dir):
+        """Test uploaded CSV is saved byte-for-byte and returned parsed"""
+        from io import BytesIO
+        local_path = os.path.join(temp_dir, 'upload.csv')
+        raw = b"col1;col2\n1;2\n3;4\n"
+        
+        result = DataLoader.load(BytesIO(raw), local_path, 'Test')
+        assert list(result.columns) == ['col1', 'col2']
+        assert len(result) == 2
+        with open(local_path, 'rb') as f:
+            assert f.read() == raw
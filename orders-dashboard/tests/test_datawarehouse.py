@@ -2,6 +2,7 @@
 Essential DataWarehouse Tests - ETL and data merging
 """
 import pytest
+import numpy as np
 import pandas as pd
 import os
 import sys
@@ -14,25 +15,23 @@ from src import DataWarehouse
 class TestDataWarehouseCore:
     """Essential DataWarehouse (ETL) tests"""
     
-    def test_merge_web_and_app_orders(self, sample_web_orders, sample_app_orders, sample_items, sample_channels):
+    def test_merge_web_and_app_orders(self, dw_built):
         """Test ETL merges web and app orders correctly"""
-        dw = DataWarehouse()
-        dw.transform_and_load(sample_web_orders, sample_app_orders, sample_items, sample_channels)
-        
-        assert not dw.merged_data.empty
-        assert len(dw.merged_data) >= 7
+        assert not dw_built.merged_data.empty
+        assert len(dw_built.merged_data) >= 7
     
     def test_deduplicate_by_order_id(self, sample_items, sample_channels):
         """Test deduplication keeps latest updated_at record"""
+        # Typed datetime64 arrays up front, no string parsing
         orders = pd.DataFrame({
             'order_id': [1, 1, 2],
-            'order_date': ['2025-01-01', '2025-01-01', '2025-01-02'],
-            'updated_at': ['2025-01-01 10:00:00', '2025-01-01 15:00:00', '2025-01-02 10:00:00'],
+            'order_date': np.array(['2025-01-01', '2025-01-01', '2025-01-02'],
+                                   dtype='datetime64[D]').astype('datetime64[ns]'),
+            'updated_at': np.array(['2025-01-01T10:00', '2025-01-01T15:00', '2025-01-02T10:00'],
+                                   dtype='datetime64[m]').astype('datetime64[ns]'),
             'status': ['completed', 'completed', 'returned'],
             'channel_id': [1, 1, 1]
         })
-        orders['order_date'] = pd.to_datetime(orders['order_date'])
-        orders['updated_at'] = pd.to_datetime(orders['updated_at'])
         
         dw = DataWarehouse()
         dw.transform_and_load(orders, pd.DataFrame(columns=orders.columns), sample_items, sample_channels)
@@ -40,11 +39,24 @@ class TestDataWarehouseCore:
         unique_orders = dw.merged_data[['order_id']].drop_duplicates()
         assert len(unique_orders) == 2
     
-    def test_join_with_items(self, sample_web_orders, sample_items, sample_channels):
-        """Test joining orders with items includes required columns"""
+    def test_deduplicate_keeps_latest_row(self, sample_items, sample_channels):
+        """Test deduplication keeps the row with the latest updated_at"""
+        orders = pd.DataFrame({
+            'order_id': [1, 2, 1],
+            'order_date': pd.to_datetime(['2025-01-01', '2025-01-02', '2025-01-01']),
+            'updated_at': pd.to_datetime(['2025-01-01 10:00:00', '2025-01-02 10:00:00', '2025-01-01 15:00:00']),
+            'status': ['completed', 'returned', 'cancelled'],
+            'channel_id': [1, 1, 1]
+        })
+        
         dw = DataWarehouse()
-        dw.transform_and_load(sample_web_orders, pd.DataFrame(columns=sample_web_orders.columns), 
-                              sample_items, sample_channels)
+        dw.transform_and_load(orders, pd.DataFrame(columns=orders.columns), sample_items, sample_channels)
         
-        assert 'quantity' in dw.merged_data.columns
-        assert 'sku' in dw.merged_data.columns
+        statuses = dw.merged_data.drop_duplicates('order_id').set_index('order_id')['status']
+        assert statuses[1] == 'cancelled'
+        assert statuses[2] == 'returned'
+    
+    def test_join_with_items(self, dw_built):
+        """Test joining orders with items includes required columns"""
+        assert 'quantity' in dw_built.merged_data.columns
+        assert 'sku' in dw_built.merged_data.columns